@@ -0,0 +1,231 @@
+"""
+Population cohort analytics computed in the database
+
+Severity distributions, score percentiles and weekly totals are aggregated
+with GROUP BY and window functions so only summary rows leave the database.
+Week-over-week changes are taken from those totals after empty weeks are
+filled in, so a change is always against the calendar week before. PostgreSQL uses percentile_cont; SQLite ranks rows with
+ROW_NUMBER() and interpolates between the two rows around each percentile.
+"""
+import math
+from datetime import date, datetime, timedelta
+from sqlalchemy import Integer, cast, func, or_, select
+from database import db
+from models import ComprehensiveAssessment, TestSubmission
+from utils import time_range_conditions
+
+DEFAULT_PERCENTILES = (0.25, 0.5, 0.75, 0.9)
+UNKNOWN_GROUP = 'unknown'
+
+
+def _is_postgres():
+    return db.session.get_bind().dialect.name == 'postgresql'
+
+
+def _week_bucket(column):
+    if _is_postgres():
+        return func.date_trunc('week', column)
+    # SQLite: the Monday on or before the timestamp
+    return func.date(column, 'weekday 0', '-6 days')
+
+
+def severity_distribution(since=None, until=None):
+    """
+    Count submissions per severity band, with each band's share of its test type
+
+    Returns:
+        dict: {'test_submissions': [...], 'comprehensive_assessments': [...]}
+    """
+    count = func.count().label('count')
+    tests = db.session.execute(
+        select(
+            TestSubmission.test_type,
+            TestSubmission.severity,
+            count,
+            (func.count() * 1.0 / func.sum(func.count()).over(partition_by=TestSubmission.test_type)).label('share')
+        )
+        .where(*time_range_conditions(TestSubmission.timestamp, since, until))
+        .group_by(TestSubmission.test_type, TestSubmission.severity)
+        .order_by(TestSubmission.test_type, TestSubmission.severity)
+    ).all()
+
+    assessments = db.session.execute(
+        select(
+            ComprehensiveAssessment.risk_level,
+            ComprehensiveAssessment.overall_severity,
+            count,
+            (func.count() * 1.0 / func.sum(func.count()).over()).label('share')
+        )
+        .where(ComprehensiveAssessment.status == 'completed',
+               *time_range_conditions(ComprehensiveAssessment.completed_at, since, until))
+        .group_by(ComprehensiveAssessment.risk_level, ComprehensiveAssessment.overall_severity)
+        .order_by(ComprehensiveAssessment.risk_level, ComprehensiveAssessment.overall_severity)
+    ).all()
+
+    return {
+        'test_submissions': [{
+            'test_type': row.test_type,
+            'severity': row.severity,
+            'count': row.count,
+            'share': round(float(row.share), 4)
+        } for row in tests],
+        'comprehensive_assessments': [{
+            'risk_level': row.risk_level,
+            'overall_severity': row.overall_severity,
+            'count': row.count,
+            'share': round(float(row.share), 4)
+        } for row in assessments]
+    }
+
+
+def _percentiles_postgres(group_column, score_column, conditions, percentiles):
+    columns = [
+        func.percentile_cont(p).within_group(score_column).label(f'p{i}')
+        for i, p in enumerate(percentiles)
+    ]
+    rows = db.session.execute(
+        select(group_column.label('grp'), func.count().label('n'), *columns)
+        .where(score_column.isnot(None), *conditions)
+        .group_by(group_column)
+        .order_by(group_column)
+    ).all()
+    return {
+        row.grp or UNKNOWN_GROUP: {
+            'count': row.n,
+            'percentiles': {str(p): float(getattr(row, f'p{i}')) for i, p in enumerate(percentiles)}
+        } for row in rows
+    }
+
+
+def _percentiles_ranked(group_column, score_column, conditions, percentiles):
+    ranked = (
+        select(
+            group_column.label('grp'),
+            score_column.label('score'),
+            func.row_number().over(partition_by=group_column, order_by=score_column).label('rn'),
+            func.count().over(partition_by=group_column).label('n')
+        )
+        .where(score_column.isnot(None), *conditions)
+        .subquery()
+    )
+    # Only fetch the rows on either side of each percentile position
+    wanted = []
+    for p in percentiles:
+        position = cast(p * (ranked.c.n - 1), Integer) + 1
+        wanted.append(or_(ranked.c.rn == position, ranked.c.rn == position + 1))
+    rows = db.session.execute(
+        select(ranked.c.grp, ranked.c.score, ranked.c.rn, ranked.c.n).where(or_(*wanted))
+    ).all()
+
+    by_group = {}
+    for row in rows:
+        group = by_group.setdefault(row.grp, {'count': row.n, 'scores': {}})
+        group['scores'][row.rn] = row.score
+
+    result = {}
+    for grp in sorted(by_group, key=lambda g: (g is None, g)):
+        group = by_group[grp]
+        values = {}
+        for p in percentiles:
+            position = p * (group['count'] - 1)
+            lower = math.floor(position)
+            low_score = group['scores'][lower + 1]
+            high_score = group['scores'].get(lower + 2, low_score)
+            values[str(p)] = float(low_score + (high_score - low_score) * (position - lower))
+        result[grp or UNKNOWN_GROUP] = {'count': group['count'], 'percentiles': values}
+    return result
+
+
+def score_percentiles(percentiles=DEFAULT_PERCENTILES, since=None, until=None):
+    """
+    Continuous score percentiles per test type and per assessment risk level
+
+    Returns:
+        dict: {'test_submissions': {test_type: {...}}, 'phq9_by_risk_level': {...}, 'gad7_by_risk_level': {...}}
+    """
+    compute = _percentiles_postgres if _is_postgres() else _percentiles_ranked
+    completed = [ComprehensiveAssessment.status == 'completed',
+                 *time_range_conditions(ComprehensiveAssessment.completed_at, since, until)]
+    return {
+        'test_submissions': compute(
+            TestSubmission.test_type, TestSubmission.score,
+            time_range_conditions(TestSubmission.timestamp, since, until), percentiles
+        ),
+        'phq9_by_risk_level': compute(
+            ComprehensiveAssessment.risk_level, ComprehensiveAssessment.phq9_score, completed, percentiles
+        ),
+        'gad7_by_risk_level': compute(
+            ComprehensiveAssessment.risk_level, ComprehensiveAssessment.gad7_score, completed, percentiles
+        ),
+    }
+
+
+def _week_start(value):
+    # PostgreSQL returns a timestamp, SQLite a 'YYYY-MM-DD' string
+    return value.date() if isinstance(value, datetime) else date.fromisoformat(str(value))
+
+
+def _weekly(group_column, time_column, conditions, score_column=None):
+    week = _week_bucket(time_column).label('week')
+    columns = [group_column.label('grp'), week, func.count().label('n')]
+    if score_column is not None:
+        columns.append(func.avg(score_column).label('avg_score'))
+    rows = db.session.execute(
+        select(*columns).where(*conditions).group_by(group_column, week).order_by(group_column, week)
+    ).all()
+    if not rows:
+        return {}
+
+    # Weeks without rows are filled in as zero, so every change is against the calendar week before
+    groups = {}
+    for row in rows:
+        groups.setdefault(row.grp or UNKNOWN_GROUP, {})[_week_start(row.week)] = row
+    first = min(min(weeks) for weeks in groups.values())
+    last = max(max(weeks) for weeks in groups.values())
+
+    result = {}
+    for grp, weeks in groups.items():
+        entries = []
+        prev_n, prev_avg = None, None
+        current = first
+        while current <= last:
+            row = weeks.get(current)
+            n = row.n if row else 0
+            entry = {
+                'week': current.isoformat(),
+                'count': n,
+                'count_change': None if prev_n is None else n - prev_n,
+            }
+            if score_column is not None:
+                avg_score = float(row.avg_score) if row and row.avg_score is not None else None
+                entry['avg_score'] = round(avg_score, 2) if avg_score is not None else None
+                entry['avg_score_change'] = (
+                    round(avg_score - prev_avg, 2) if avg_score is not None and prev_avg is not None else None
+                )
+                prev_avg = avg_score
+            entries.append(entry)
+            prev_n = n
+            current += timedelta(weeks=1)
+        result[grp] = entries
+    return result
+
+
+def weekly_changes(since=None, until=None):
+    """
+    Weekly counts and average scores with the change from the previous week
+
+    Returns:
+        dict: {'test_submissions': {test_type: [...]}, 'comprehensive_assessments': {risk_level: [...]}}
+    """
+    return {
+        'test_submissions': _weekly(
+            TestSubmission.test_type, TestSubmission.timestamp,
+            time_range_conditions(TestSubmission.timestamp, since, until), TestSubmission.score
+        ),
+        'comprehensive_assessments': _weekly(
+            ComprehensiveAssessment.risk_level, ComprehensiveAssessment.completed_at,
+            [ComprehensiveAssessment.status == 'completed',
+             *time_range_conditions(ComprehensiveAssessment.completed_at, since, until)],
+            ComprehensiveAssessment.phq9_score
+        ),
+    }
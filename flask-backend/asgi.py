@@ -0,0 +1,300 @@
+"""
+Async (ASGI) serving path for the read-heavy endpoints
+
+Serves the dashboard, forum, feedback, profile and mood history reads with
+SQLAlchemy's asyncio engine (asyncpg on PostgreSQL, aiosqlite on SQLite),
+so a worker waiting on the database keeps serving other requests. The
+independent sections of a dashboard are queried concurrently, each on its
+own session. Models and response bodies are shared with the Flask app;
+writes stay on the WSGI app. The dashboard event stream is served here too:
+an open stream is a suspended coroutine, where the WSGI app would tie up a
+worker thread for its whole length.
+
+Run next to the Flask app and route the GET paths below to it:
+    uvicorn asgi:app --port 5002 --workers 2
+"""
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+from cache_backends import NamespacedCache
+from database import instance_sqlite_url, resolve_database_url
+from events import broker_from_env, event_stream, user_channels
+from models import (
+    BreathingExerciseLog, ComprehensiveAssessment, FacialAnalysisSession, Feedback, ForumPost,
+    MoodGrooveResult, Profile, TestSubmission
+)
+from utils import create_error_response, log_error, parse_time_range, time_range_conditions
+import serializers
+
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'postgres': 'postgresql+asyncpg',
+    'postgresql+psycopg2': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+FEATURED_FEEDBACK_LIMIT = int(os.getenv('FEATURED_FEEDBACK_LIMIT', 20))
+FEATURED_FEEDBACK_MAX_LIMIT = 100
+MOOD_HISTORY_LIMIT = 50
+
+
+def async_database_url(url):
+    """
+    Swap a sync database URL's driver for its asyncio counterpart
+
+    asyncpg takes ssl= rather than libpq's sslmode=, so that parameter is renamed.
+    """
+    scheme, sep, rest = url.partition('://')
+    if scheme not in ASYNC_DRIVERS:
+        return url
+    if ASYNC_DRIVERS[scheme].endswith('asyncpg'):
+        rest = rest.replace('sslmode=', 'ssl=')
+    return f"{ASYNC_DRIVERS[scheme]}{sep}{rest}"
+
+
+# The Flask app's database (including its SQLite fallback under instance/) unless ASYNC_DATABASE_URL is set
+engine = create_async_engine(
+    async_database_url(os.getenv('ASYNC_DATABASE_URL') or instance_sqlite_url(resolve_database_url())),
+    pool_pre_ping=True,
+)
+Session = async_sessionmaker(engine, expire_on_commit=False)
+
+# Same namespace as the Flask app's feedback cache: with a shared CACHE_BACKEND its
+# invalidations reach this process too; with the local backend this copy only expires by TTL
+feedback_cache = NamespacedCache('feedback', ttl_seconds=int(os.getenv('FEEDBACK_CACHE_TTL', 300)))
+
+# Events are published by the Flask workers, so this needs the shared broker (the default)
+event_broker = broker_from_env()
+
+
+async def fetch_all(statement):
+    """Run one SELECT on its own session so several can be in flight at once"""
+    async with Session() as session:
+        return (await session.execute(statement)).scalars().all()
+
+
+async def fetch_first(statement):
+    async with Session() as session:
+        return (await session.execute(statement.limit(1))).scalars().first()
+
+
+async def gather_sections(endpoint, user_id, sections):
+    """
+    Run named section queries concurrently; a failing section is logged and left empty
+
+    Returns:
+        dict: {section: result}
+    """
+    results = await asyncio.gather(*sections.values(), return_exceptions=True)
+    gathered = {}
+    for name, result in zip(sections, results):
+        if isinstance(result, Exception):
+            print(f"Error fetching {name}: {result}")
+            log_error(endpoint, result, user_id, {'section': name})
+            result = None if name == 'user_profile' else []
+        gathered[name] = result
+    return gathered
+
+
+def error_response(message, e):
+    body, status_code = create_error_response(message, str(e))
+    return JSONResponse(body, status_code=status_code)
+
+
+async def unified_dashboard(request):
+    user_id = request.path_params['user_id']
+    user_email = request.path_params['user_email']
+    sections = serializers.UNIFIED_DASHBOARD_SECTIONS
+    fields = serializers.section_fields(sections, request.query_params)
+    try:
+        since, until = parse_time_range(request.query_params)
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+    def section_query(name, model, condition):
+        return select(model).where(condition, *time_range_conditions(model.timestamp, since, until)).options(
+            sections[name].load_options(fields[name])
+        )
+
+    try:
+        data = await gather_sections('/api/dashboard/unified', user_id, {
+            'test_submissions': fetch_all(
+                section_query('test_submissions', TestSubmission, TestSubmission.user_id == user_id)
+            ),
+            'mood_by_id': fetch_all(
+                section_query('mood_groove_results', MoodGrooveResult, MoodGrooveResult.user_id == user_id)
+            ),
+            'mood_by_email': fetch_all(
+                section_query('mood_groove_results', MoodGrooveResult, MoodGrooveResult.user_email == user_email)
+            ),
+            'breathing_exercises': fetch_all(
+                section_query('breathing_exercises', BreathingExerciseLog, BreathingExerciseLog.user_id == user_id)
+            ),
+            'facial_analysis': fetch_all(section_query(
+                'facial_analysis_sessions', FacialAnalysisSession, FacialAnalysisSession.user_email == user_email
+            )),
+            'comprehensive_assessments': fetch_all(section_query(
+                'comprehensive_assessments', ComprehensiveAssessment, ComprehensiveAssessment.user_id == user_id
+            )),
+            'user_profile': fetch_first(select(Profile).where(Profile.id == user_id)),
+        })
+        # Combine and deduplicate mood groove results found by id and by email
+        mood_results = {result.id: result for result in data['mood_by_id'] + data['mood_by_email']}
+        return JSONResponse(serializers.unified_dashboard(
+            data['test_submissions'], list(mood_results.values()), data['breathing_exercises'],
+            data['facial_analysis'], data['comprehensive_assessments'], data['user_profile'], fields
+        ))
+    except Exception as e:
+        log_error('/api/dashboard/unified', e, user_id, {'user_email': user_email})
+        return error_response('Failed to fetch unified dashboard data', e)
+
+
+async def dashboard_overall(request):
+    user_id = request.path_params['user_id']
+    sections = serializers.USER_DASHBOARD_SECTIONS
+    fields = serializers.section_fields(sections, request.query_params)
+    try:
+        since, until = parse_time_range(request.query_params)
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+    def section_query(name, model):
+        return select(model).where(model.user_id == user_id, *time_range_conditions(model.timestamp, since, until)).options(
+            sections[name].load_options(fields[name])
+        )
+
+    test_submissions, mood_groove_results, breathing_logs = await asyncio.gather(
+        fetch_all(section_query('test_submissions', TestSubmission)),
+        fetch_all(section_query('mood_groove_results', MoodGrooveResult)),
+        fetch_all(section_query('breathing_exercises', BreathingExerciseLog)),
+    )
+    return JSONResponse({
+        **serializers.dump_sections(sections, {
+            'test_submissions': test_submissions,
+            'mood_groove_results': mood_groove_results,
+            'breathing_exercises': breathing_logs,
+        }, fields),
+        'test_count': len(test_submissions)
+    })
+
+
+async def forum(request):
+    try:
+        statement = select(ForumPost).where(ForumPost.is_approved.is_(True))
+        category = request.query_params.get('category')
+        if category:
+            if category == 'General':
+                # Posts created before the category column existed have no category
+                statement = statement.where((ForumPost.category == category) | (ForumPost.category.is_(None)))
+            else:
+                statement = statement.where(ForumPost.category == category)
+        posts = await fetch_all(statement.order_by(ForumPost.timestamp.desc()))
+        return JSONResponse(serializers.FORUM_POST.dump_many(posts))
+    except Exception as e:
+        print(f"Error fetching forum posts: {str(e)}")
+        return JSONResponse({'error': f'Failed to fetch forum posts: {str(e)}'}, status_code=500)
+
+
+async def featured_feedback(request):
+    try:
+        limit = int(request.query_params.get('limit', FEATURED_FEEDBACK_LIMIT))
+    except ValueError:
+        limit = FEATURED_FEEDBACK_LIMIT
+    limit = max(1, min(limit, FEATURED_FEEDBACK_MAX_LIMIT))
+    cache_key = f'feedback:featured:{limit}'
+    try:
+        # Shared backends do blocking I/O, so keep it off the event loop
+        featured = await asyncio.to_thread(feedback_cache.get, cache_key)
+        if featured is None:
+            feedbacks = await fetch_all(
+                select(Feedback).where(Feedback.is_featured.is_(True)).order_by(Feedback.timestamp.desc()).limit(limit)
+            )
+            featured = serializers.FEATURED_FEEDBACK.dump_many(feedbacks)
+            await asyncio.to_thread(feedback_cache.set, cache_key, featured)
+        return JSONResponse(featured)
+    except Exception as e:
+        print(f"Error fetching feedback: {str(e)}")
+        return JSONResponse({'error': f'Failed to fetch feedback: {str(e)}'}, status_code=500)
+
+
+async def get_profile(request):
+    user_id = request.path_params['user_id']
+    try:
+        profile = await fetch_first(select(Profile).where(Profile.id == user_id))
+        if profile:
+            return JSONResponse(serializers.PROFILE.dump(profile))
+        return JSONResponse({'error': 'Profile not found'}, status_code=404)
+    except Exception as e:
+        log_error('/api/profile', e, user_id)
+        return error_response('Failed to fetch profile', e)
+
+
+async def mood_groove_history(request):
+    user_id = request.path_params['user_id']
+    try:
+        since, until = parse_time_range(request.query_params)
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+    try:
+        results = await fetch_all(
+            select(MoodGrooveResult).where(MoodGrooveResult.user_id == user_id,
+                                           *time_range_conditions(MoodGrooveResult.timestamp, since, until))
+            .order_by(MoodGrooveResult.timestamp.desc()).limit(MOOD_HISTORY_LIMIT)
+        )
+        return JSONResponse(serializers.MOOD_GROOVE_HISTORY.dump_many(results))
+    except Exception as e:
+        print(f"Error fetching mood groove history: {e}")
+        return JSONResponse({'error': 'Failed to fetch mood groove history'}, status_code=500)
+
+
+async def dashboard_events(request):
+    """
+    Server-Sent Events stream of the user's dashboard changes
+
+    Each event names a section and the row that changed; fetch the rows from
+    /api/dashboard/changes. Pass ?email= to also receive facial analysis
+    sessions, which are stored by email only.
+    """
+    user_id = request.path_params['user_id']
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID') or request.query_params.get('lastEventId') or 0)
+    except ValueError:
+        last_event_id = 0
+    # Replaying from the shared broker reads its SQLite file
+    subscription = await asyncio.to_thread(
+        event_broker.subscribe, user_channels(user_id, request.query_params.get('email')), last_event_id
+    )
+    return StreamingResponse(event_stream(subscription), media_type='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',  # Don't let nginx buffer the stream
+    })
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    await engine.dispose()
+
+
+app = Starlette(
+    routes=[
+        Route('/api/dashboard/unified/{user_id}/{user_email}', unified_dashboard),
+        Route('/api/dashboard/overall/{user_id}', dashboard_overall),
+        Route('/api/forum', forum),
+        Route('/api/feedback', featured_feedback),
+        Route('/api/profile/{user_id}', get_profile),
+        Route('/api/mood-groove/history/{user_id}', mood_groove_history),
+        Route('/api/events/{user_id}', dashboard_events),
+    ],
+    middleware=[Middleware(
+        CORSMiddleware,
+        allow_origins=os.getenv('ALLOWED_ORIGINS', 'http://localhost:3000,http://localhost:3001').split(','),
+    )],
+    lifespan=lifespan,
+)
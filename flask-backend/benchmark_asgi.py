@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark the ASGI read path against the WSGI (Flask) app under rising concurrency
+
+Start both servers against the same database first, e.g.:
+    gunicorn --bind 0.0.0.0:5001 --workers 2 --threads 4 app:app
+    uvicorn asgi:app --port 5002 --workers 2
+
+Usage:
+    python benchmark_asgi.py --user-id user-00000001 --user-email user00000001@example.com
+    python benchmark_asgi.py --concurrency 8,32,128 --requests 400
+"""
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+
+def run_level(base_url, paths, concurrency, total):
+    """
+    Fire total GETs spread over paths with concurrency requests in flight
+
+    Returns:
+        dict: throughput and latency percentiles in milliseconds
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    def one(i):
+        started = time.perf_counter()
+        try:
+            ok = session.get(f"{base_url}{paths[i % len(paths)]}", timeout=60).status_code < 500
+        except requests.RequestException:
+            ok = False
+        return (time.perf_counter() - started) * 1000, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(ms for ms, _ in results)
+    return {
+        'rps': total / elapsed,
+        'p50': statistics.median(latencies),
+        'p95': latencies[int(len(latencies) * 0.95) - 1],
+        'errors': sum(1 for _, ok in results if not ok),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare WSGI and ASGI read throughput')
+    parser.add_argument('--wsgi-url', default='http://localhost:5001')
+    parser.add_argument('--asgi-url', default='http://localhost:5002')
+    parser.add_argument('--user-id', default='test-user-123')
+    parser.add_argument('--user-email', default='test@example.com')
+    parser.add_argument('--concurrency', default='1,8,32,128')
+    parser.add_argument('--requests', type=int, default=400, help='Requests per concurrency level')
+    args = parser.parse_args()
+
+    paths = [
+        f'/api/dashboard/unified/{args.user_id}/{args.user_email}',
+        f'/api/dashboard/overall/{args.user_id}',
+        f'/api/mood-groove/history/{args.user_id}',
+        f'/api/profile/{args.user_id}',
+        '/api/forum',
+        '/api/feedback',
+    ]
+
+    print(f"{'concurrency':>11} {'server':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>6}")
+    for concurrency in (int(c) for c in args.concurrency.split(',')):
+        for name, base_url in (('wsgi', args.wsgi_url), ('asgi', args.asgi_url)):
+            result = run_level(base_url, paths, concurrency, args.requests)
+            print(f"{concurrency:>11} {name:>6} {result['rps']:>8.1f} {result['p50']:>8.1f} "
+                  f"{result['p95']:>8.1f} {result['errors']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark the vectorised trend summary against a naive Python loop
+
+Usage:
+    python benchmark_trends.py [--sizes 1000,10000,100000] [--repeat 5]
+"""
+
+import argparse
+import math
+import time
+import numpy as np
+from trends import DEFAULT_SPAN, DEFAULT_WINDOW, DEFAULT_Z_THRESHOLD, summarize_series
+
+
+def naive_summary(timestamps, values, window=DEFAULT_WINDOW, span=DEFAULT_SPAN, z_threshold=DEFAULT_Z_THRESHOLD):
+    """Reference implementation with one Python-level pass per statistic"""
+    n = len(values)
+    start = timestamps[0]
+    days = [(t - start).total_seconds() / 86400.0 for t in timestamps]
+
+    rolling = [sum(values[i - window:i]) / window for i in range(window, n + 1)]
+
+    alpha = 2.0 / (span + 1.0)
+    numerator = denominator = 0.0
+    for value in values:
+        numerator = value + (1.0 - alpha) * numerator
+        denominator = 1.0 + (1.0 - alpha) * denominator
+    ewma = numerator / denominator
+
+    mean_x = sum(days) / n
+    mean_y = sum(values) / n
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in zip(days, values))
+    variance = sum((x - mean_x) ** 2 for x in days)
+    slope = covariance / variance if variance else 0.0
+
+    anomalies = 0
+    for i in range(window, n):
+        previous = values[i - window:i]
+        mean = sum(previous) / window
+        std = math.sqrt(max(sum(v * v for v in previous) / window - mean * mean, 0.0))
+        if std > 0 and abs((values[i] - mean) / std) > z_threshold:
+            anomalies += 1
+
+    return {
+        'rolling_mean': rolling[-1] if rolling else None,
+        'ewma': ewma,
+        'slope_per_day': slope,
+        'anomaly_count': anomalies,
+    }
+
+
+def synthetic_series(size, seed=42):
+    rng = np.random.default_rng(seed)
+    start = np.datetime64('2024-01-01T00:00:00', 'us')
+    offsets = np.cumsum(rng.integers(60, 36 * 3600, size=size)).astype('timedelta64[s]')
+    timestamps = start + offsets.astype('timedelta64[us]')
+    values = np.clip(40 + np.cumsum(rng.normal(0, 1.5, size=size)) + rng.normal(0, 5, size=size), 0, 100)
+    spikes = rng.choice(size, size=max(1, size // 200), replace=False)
+    values[spikes] += 40
+    return timestamps, values
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='1000,10000,100000')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'points':>10} {'naive (ms)':>12} {'numpy (ms)':>12} {'speedup':>9}  match")
+    for size in (int(s) for s in args.sizes.split(',')):
+        timestamps, values = synthetic_series(size)
+        py_timestamps = timestamps.astype('datetime64[us]').astype(object).tolist()
+        py_values = values.tolist()
+
+        naive_time, naive = best_of(lambda: naive_summary(py_timestamps, py_values), args.repeat)
+        fast_time, fast = best_of(lambda: summarize_series(timestamps, values), args.repeat)
+
+        match = (
+            math.isclose(naive['rolling_mean'], fast['rolling_mean'], rel_tol=1e-9)
+            and math.isclose(naive['ewma'], fast['ewma'], rel_tol=1e-9)
+            and math.isclose(naive['slope_per_day'], fast['slope_per_day'], rel_tol=1e-6, abs_tol=1e-12)
+            and naive['anomaly_count'] == fast['anomalies']['count']
+        )
+        print(f"{size:>10} {naive_time * 1000:>12.2f} {fast_time * 1000:>12.2f} {naive_time / fast_time:>8.1f}x  {'✅' if match else '❌'}")
+
+
+if __name__ == "__main__":
+    main()
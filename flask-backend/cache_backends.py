@@ -0,0 +1,320 @@
+"""
+Cache backends shared by the gunicorn workers (and the ASGI app) on a host
+
+NamespacedCache is what the app uses: get/set with a TTL, in-place update
+(which drops the key instead under contention), and invalidate() which
+drops one key or, by bumping the namespace version, every key at once. get_or_set() lets one caller recompute a missing value
+while concurrent callers wait for it instead of all hitting the database.
+
+Backends, chosen with CACHE_BACKEND:
+    local   in-process LRU (default); every worker has its own copy
+    sqlite  a SQLite file shared by every process on the host (CACHE_URL is the path)
+    redis   any server speaking the Redis protocol (CACHE_URL=redis://host:6379/0);
+            redis_standin.py is a small local server for development and tests
+
+Shared backends store values as JSON, so only cache JSON-serialisable values.
+Namespace versions are keys without a TTL; on Redis use an eviction policy
+that spares them (volatile-lru or noeviction).
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from cache import TTLCache
+
+LOCK_SECONDS = 10
+LOCK_WAIT_SECONDS = 0.05
+
+
+class LocalBackend:
+    """In-process LRU; values are stored as-is"""
+
+    def __init__(self, max_entries=4096):
+        self._entries = TTLCache(max_entries=max_entries)
+        # Namespace versions live outside the LRU: evicting one would resurrect older entries
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        if key in self._counters:
+            return self._counters[key]
+        return self._entries.get(key)
+
+    def set(self, key, value, ttl_seconds):
+        self._entries.set(key, value, ttl_seconds)
+
+    def add(self, key, value, ttl_seconds):
+        """Set key only if it is absent; True if it was set"""
+        with self._lock:
+            if self._entries.get(key) is not None:
+                return False
+            self._entries.set(key, value, ttl_seconds)
+            return True
+
+    def delete(self, key):
+        self._entries.invalidate(key)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+
+class SQLiteBackend:
+    """
+    Key/value rows with an expiry in a SQLite file shared by processes on one host
+
+    Args:
+        path: SQLite file path
+        purge_every: Delete expired rows after this many writes
+    """
+
+    def __init__(self, path, purge_every=500):
+        self.path = path
+        self.purge_every = purge_every
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)'
+            )
+            self._local.connection = connection
+        return connection
+
+    def get(self, key):
+        row = self._connection().execute(
+            'SELECT value FROM cache WHERE key = ? AND expires_at > ?', (key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key, value, ttl_seconds):
+        self._connection().execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)',
+            (key, json.dumps(value), time.time() + ttl_seconds)
+        )
+        self._wrote()
+
+    def add(self, key, value, ttl_seconds):
+        now = time.time()
+        # Inserts, or replaces a row that has expired; leaves a live row alone
+        cursor = self._connection().execute(
+            'INSERT INTO cache (key, value, expires_at) VALUES (?, ?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at '
+            'WHERE cache.expires_at <= ?',
+            (key, json.dumps(value), now + ttl_seconds, now)
+        )
+        self._wrote()
+        return cursor.rowcount == 1
+
+    def delete(self, key):
+        self._connection().execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def incr(self, key):
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute('SELECT value FROM cache WHERE key = ?', (key,)).fetchone()
+            value = (json.loads(row[0]) if row else 0) + 1
+            connection.execute(
+                'INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)',
+                (key, json.dumps(value), float('inf'))
+            )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return value
+
+    def _wrote(self):
+        self._writes += 1
+        if self._writes % self.purge_every == 0:
+            self._connection().execute('DELETE FROM cache WHERE expires_at <= ?', (time.time(),))
+
+
+class RedisBackend:
+    """
+    Backend for a Redis-protocol server; needs the redis package
+
+    Args:
+        url: e.g. redis://localhost:6379/0
+    """
+
+    def __init__(self, url):
+        import redis  # Optional dependency, only needed with CACHE_BACKEND=redis
+        self.client = redis.Redis.from_url(url, socket_timeout=1.0, socket_connect_timeout=1.0)
+
+    def get(self, key):
+        value = self.client.get(key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, value, ttl_seconds):
+        self.client.set(key, json.dumps(value), ex=max(int(ttl_seconds), 1))
+
+    def add(self, key, value, ttl_seconds):
+        return bool(self.client.set(key, json.dumps(value), ex=max(int(ttl_seconds), 1), nx=True))
+
+    def delete(self, key):
+        self.client.delete(key)
+
+    def incr(self, key):
+        return self.client.incr(key)
+
+
+def backend_from_env():
+    """Backend selected by CACHE_BACKEND and CACHE_URL"""
+    kind = os.getenv('CACHE_BACKEND', 'local').lower()
+    if kind == 'sqlite':
+        return SQLiteBackend(os.getenv('CACHE_URL') or os.path.join(tempfile.gettempdir(), 'calmnest_cache.db'))
+    if kind == 'redis':
+        return RedisBackend(os.getenv('CACHE_URL', 'redis://localhost:6379/0'))
+    return LocalBackend()
+
+
+_default_backend = None
+_default_backend_lock = threading.Lock()
+
+
+def default_backend():
+    global _default_backend
+    with _default_backend_lock:
+        if _default_backend is None:
+            _default_backend = backend_from_env()
+        return _default_backend
+
+
+class NamespacedCache:
+    """
+    Cache keys under a versioned namespace on a backend
+
+    Keys are stored as "<namespace>:v<version>:<key>". invalidate() without a
+    key increments the version, which orphans every key of the namespace in
+    one write; orphans expire by TTL.
+
+    A backend that is down is treated as a miss: callers fall back to the
+    database rather than fail.
+
+    Args:
+        namespace: Prefix shared by every key of this cache
+        ttl_seconds: Default TTL for set()
+        backend: Backend instance; defaults to the one configured by CACHE_BACKEND
+    """
+
+    def __init__(self, namespace, ttl_seconds=300, backend=None):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self._backend = backend
+
+    @property
+    def backend(self):
+        return self._backend or default_backend()
+
+    def _version(self):
+        return self.backend.get(f'{self.namespace}:version') or 0
+
+    def _key(self, key):
+        return f'{self.namespace}:v{self._version()}:{key}'
+
+    def get(self, key, default=None):
+        try:
+            value = self.backend.get(self._key(key))
+        except Exception as e:
+            print(f"Cache get failed for {self.namespace}:{key}: {e}")
+            return default
+        return default if value is None else value
+
+    def set(self, key, value, ttl_seconds=None):
+        try:
+            self.backend.set(self._key(key), value, self.ttl_seconds if ttl_seconds is None else ttl_seconds)
+        except Exception as e:
+            print(f"Cache set failed for {self.namespace}:{key}: {e}")
+
+    def invalidate(self, key=None):
+        """Drop one key, or every key of the namespace when key is None"""
+        try:
+            if key is None:
+                self.backend.incr(f'{self.namespace}:version')
+            else:
+                self.backend.delete(self._key(key))
+        except Exception as e:
+            print(f"Cache invalidate failed for {self.namespace}: {e}")
+
+    def update(self, key, func):
+        """
+        Apply func to a cached value, serialised across processes by a short lock
+
+        A caller that finds the lock busy can't apply its change, so it
+        leaves a short-lived tombstone and drops the key. The lock holder
+        checks for a tombstone after writing its value back and drops the key
+        if it finds one: its value was computed without the other change.
+        Checking after the write covers both orders of the holder's write and
+        the other caller's delete. Either way the next read misses and goes
+        to the database rather than see a stale value.
+
+        Returns:
+            bool: True if the key was present and updated
+        """
+        try:
+            stored_key = self._key(key)
+            lock_key = f'{stored_key}:lock'
+            stale_key = f'{stored_key}:stale'
+            if not self.backend.add(lock_key, 1, LOCK_SECONDS):
+                self.backend.set(stale_key, 1, LOCK_SECONDS)
+                self.backend.delete(stored_key)
+                return False
+            try:
+                value = self.backend.get(stored_key)
+                if value is None:
+                    return False
+                self.backend.set(stored_key, func(value), self.ttl_seconds)
+                if self.backend.get(stale_key) is not None:
+                    self.backend.delete(stored_key)
+                    return False
+                return True
+            finally:
+                self.backend.delete(lock_key)
+        except Exception as e:
+            print(f"Cache update failed for {self.namespace}:{key}: {e}")
+            return False
+
+    def get_or_set(self, key, compute, ttl_seconds=None, wait_seconds=LOCK_SECONDS):
+        """
+        Return the cached value, computing it at most once across concurrent callers
+
+        The caller that wins the lock computes and stores the value; the
+        others poll for it for up to wait_seconds and compute it themselves
+        only if it still hasn't appeared.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        lock_key = f'{self.namespace}:lock:{key}'
+        try:
+            holder = self.backend.add(lock_key, 1, wait_seconds)
+        except Exception as e:
+            print(f"Cache lock failed for {self.namespace}:{key}: {e}")
+            holder = True
+        if not holder:
+            deadline = time.monotonic() + wait_seconds
+            while time.monotonic() < deadline:
+                time.sleep(LOCK_WAIT_SECONDS)
+                value = self.get(key)
+                if value is not None:
+                    return value
+        try:
+            value = compute()
+            self.set(key, value, ttl_seconds)
+            return value
+        finally:
+            if holder:
+                try:
+                    self.backend.delete(lock_key)
+                except Exception:
+                    pass
@@ -0,0 +1,171 @@
+"""
+Incremental dashboard sync
+
+A client keeps a local copy of its dashboard and asks only for what changed
+since an opaque cursor. Append-only sections (mood groove results, breathing
+logs, facial analysis sessions) are tracked by their increasing primary key.
+Sections updated in place are tracked by (updated_at, id): comprehensive
+assessments, and test submissions, which a rescore rewrites. The profile is
+tracked by updated_at. Every
+section is read with a keyset predicate on top of the per-user indexes, so
+a sync costs O(changes) rather than O(history).
+
+updated_at is set by the app, so a transaction can commit a row with an
+updated_at older than one already returned. The cursor therefore stops short
+of rows younger than DASHBOARD_SYNC_LAG_SECONDS: they are returned, and
+returned again on the next sync, until they are old enough to pass.
+
+Rows are upserted by id on the client. A request without a cursor returns
+the full dashboard and the cursor to continue from.
+"""
+import base64
+import json
+import os
+from datetime import datetime, timedelta
+from sqlalchemy import or_, tuple_
+from models import (
+    BreathingExerciseLog, ComprehensiveAssessment, FacialAnalysisSession, MoodGrooveResult, Profile, TestSubmission
+)
+import serializers
+
+CURSOR_VERSION = 2
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 2000
+LAG_SECONDS = int(os.getenv('DASHBOARD_SYNC_LAG_SECONDS', 60))
+
+# section -> (model, owner column: 'user_id' or 'user_email')
+APPEND_ONLY_SECTIONS = {
+    'mood_groove_results': (MoodGrooveResult, None),  # Matched by user_id or user_email
+    'breathing_exercises': (BreathingExerciseLog, 'user_id'),
+    'facial_analysis_sessions': (FacialAnalysisSession, 'user_email'),
+}
+
+# section -> (model, serializer); owned by user_id and tracked by (updated_at, id)
+UPDATED_SECTIONS = {
+    'test_submissions': (TestSubmission, serializers.UNIFIED_DASHBOARD_SECTIONS['test_submissions']),
+    'comprehensive_assessments': (ComprehensiveAssessment, serializers.COMPREHENSIVE_ASSESSMENT),
+}
+
+
+def encode_sync_cursor(positions):
+    raw = json.dumps({'v': CURSOR_VERSION, **positions}, separators=(',', ':'), sort_keys=True)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_sync_cursor(cursor):
+    """
+    Decode a cursor produced by encode_sync_cursor
+
+    Raises:
+        ValueError: If the cursor is malformed or from another version
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        positions = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(positions, dict) or positions.pop('v', None) != CURSOR_VERSION:
+        raise ValueError("Cursor is from an older version; sync again without a cursor")
+    return positions
+
+
+def _owner_condition(model, owner, user_id, user_email):
+    if owner == 'user_id':
+        return model.user_id == user_id
+    if owner == 'user_email':
+        return model.user_email == user_email
+    conditions = [model.user_id == user_id]
+    if user_email:
+        conditions.append(model.user_email == user_email)
+    return or_(*conditions)
+
+
+def _last_id(position):
+    try:
+        return int(position or 0)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor position") from e
+
+
+def _after_updated(model, position):
+    """(updated_at, id) strictly after a stored [iso, id] position"""
+    if not position:
+        return []
+    try:
+        updated_at, record_id = datetime.fromisoformat(position[0]), int(position[1])
+    except (TypeError, ValueError, IndexError) as e:
+        raise ValueError("Invalid cursor position") from e
+    return [tuple_(model.updated_at, model.id) > (updated_at, record_id)]
+
+
+def dashboard_changes(user_id, user_email=None, cursor=None, limit=DEFAULT_LIMIT, lag_seconds=LAG_SECONDS):
+    """
+    Records created or updated since cursor, for every dashboard section
+
+    Args:
+        user_id: Dashboard owner
+        user_email: Owner's email; looked up from the profile when omitted
+        cursor: Cursor from a previous call, or None for a full sync
+        limit: Maximum rows per section; has_more is set when any section hit it
+        lag_seconds: Rows updated more recently than this are returned but not passed by the cursor
+
+    Returns:
+        dict: {'changes': {section: [...]}, 'cursor': str, 'has_more': bool}
+
+    Raises:
+        ValueError: If the cursor is invalid
+    """
+    positions = decode_sync_cursor(cursor) if cursor else {}
+    new_positions = dict(positions)
+    settled_before = datetime.utcnow() - timedelta(seconds=lag_seconds)
+    changes = {}
+    has_more = False
+
+    profile = Profile.query.filter_by(id=user_id).first()
+    user_email = user_email or (profile.email if profile else None)
+
+    for section, (model, owner) in APPEND_ONLY_SECTIONS.items():
+        if owner == 'user_email' and not user_email:
+            changes[section] = []
+            continue
+        serializer = serializers.UNIFIED_DASHBOARD_SECTIONS[section]
+        rows = model.query.filter(
+            _owner_condition(model, owner, user_id, user_email),
+            model.id > _last_id(positions.get(section))
+        ).order_by(model.id).limit(limit + 1).all()
+        has_more = has_more or len(rows) > limit
+        rows = rows[:limit]
+        changes[section] = serializer.dump_many(rows)
+        if rows:
+            new_positions[section] = rows[-1].id
+
+    for section, (model, serializer) in UPDATED_SECTIONS.items():
+        rows = model.query.filter(
+            model.user_id == user_id,
+            *_after_updated(model, positions.get(section))
+        ).order_by(model.updated_at, model.id).limit(limit + 1).all()
+        full_page = len(rows) > limit
+        has_more = has_more or full_page
+        rows = rows[:limit]
+        changes[section] = serializer.dump_many(rows)
+        # A full page always advances the cursor, so a burst of recent updates can't stall paging
+        last = next((row for row in reversed(rows) if row.updated_at is not None and
+                     (full_page or row.updated_at < settled_before)), None)
+        if last is not None:
+            new_positions[section] = [last.updated_at.isoformat(), last.id]
+
+    profile_position = positions.get('user_profile')
+    profile_changed = profile is not None and (
+        profile_position is None or
+        (profile.updated_at is not None and profile.updated_at > datetime.fromisoformat(profile_position))
+    )
+    changes['user_profile'] = serializers.DASHBOARD_PROFILE.dump(profile) if profile_changed else None
+    if profile_changed and profile.updated_at is not None and profile.updated_at < settled_before:
+        new_positions['user_profile'] = profile.updated_at.isoformat()
+
+    return {
+        'user_id': user_id,
+        'changes': changes,
+        'cursor': encode_sync_cursor(new_positions),
+        'has_more': has_more,
+    }
@@ -0,0 +1,309 @@
+"""
+Live dashboard events pushed to clients over Server-Sent Events
+
+Write routes publish a small event after they commit ("a mood groove result
+with id 12 was created"); /api/events/<user_id> streams the events for one
+user, and the client pulls the rows themselves through the dashboard
+changes endpoint. Nothing is re-queried while a user is idle.
+
+Streams are long-lived, so they are served by the ASGI app (asgi.py), where
+an idle stream costs a coroutine rather than one of the WSGI worker's
+threads. Writes happen in the Flask workers, so events cross processes:
+SQLiteBroker (the default) passes them through a small SQLite file shared
+by every process on the host, the same approach as the rate limit store.
+LocalBroker (EVENT_BROKER=local) only delivers within one process.
+
+Event ids start from the current time in microseconds rather than 1, so
+they keep increasing across restarts and a Last-Event-ID from before a
+restart or from another process is detected; such a client is sent a
+'resync' event instead of a silently incomplete stream.
+"""
+import asyncio
+import itertools
+import json
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+import time
+
+HEARTBEAT_SECONDS = 15
+MAX_STREAM_SECONDS = int(os.getenv('SSE_MAX_STREAM_SECONDS', 300))
+RECONNECT_MS = 3000
+SUBSCRIBER_QUEUE_SIZE = 100
+PRUNE_INTERVAL_SECONDS = 60
+
+
+def user_channel(user_id=None, user_email=None):
+    """Channel an event is published on: the user id when the row has one, else the email"""
+    return f'user:{user_id}' if user_id else f'email:{user_email}'
+
+
+def user_channels(user_id, user_email=None):
+    """Channels a user's stream listens on; facial analysis sessions are only keyed by email"""
+    channels = [user_channel(user_id)]
+    if user_email:
+        channels.append(user_channel(user_email=user_email))
+    return channels
+
+
+class Subscription:
+    """
+    Events for a set of channels, buffered until the stream reads them
+
+    A subscriber that falls SUBSCRIBER_QUEUE_SIZE events behind stops
+    receiving and is sent a single 'resync' event instead, after which it
+    should fetch the dashboard changes and reconnect.
+    """
+
+    def __init__(self, broker, channels, last_event_id=0):
+        self.broker = broker
+        self.channels = tuple(channels)
+        self.last_event_id = last_event_id
+        self.overflowed = False
+        self.on_put = None  # Called from the publishing thread after an event is queued
+        self._queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def put(self, event):
+        # Replayed and polled events can overlap; ids only move forward
+        if self.overflowed or event['id'] <= self.last_event_id:
+            return
+        try:
+            self._queue.put_nowait(event)
+            self.last_event_id = event['id']
+        except queue.Full:
+            self.overflowed = True
+        if self.on_put is not None:
+            self.on_put()
+
+    def request_resync(self):
+        """Send 'resync' once the queued events are read: events may have been missed"""
+        self.overflowed = True
+
+    def get_nowait(self):
+        """Next event, or None if none is queued"""
+        if self.overflowed and self._queue.empty():
+            return {'id': self.last_event_id, 'type': 'resync', 'data': {}}
+        try:
+            return self._queue.get_nowait()
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """In-process publish/subscribe; events reach subscribers in this process only"""
+
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._first_id = epoch_event_id()
+        self._last_id = self._first_id - 1
+        self._ids = itertools.count(self._first_id)
+
+    def publish(self, channel, event_type, data):
+        event_id = next(self._ids)
+        self._last_id = event_id
+        self._deliver(channel, {'id': event_id, 'type': event_type, 'data': data})
+
+    def subscribe(self, channels, last_event_id=None):
+        """
+        Start receiving events for channels
+
+        Args:
+            channels: Channel names, see user_channels
+            last_event_id: Last id the client saw; brokers that keep history replay what came after
+
+        Returns:
+            Subscription: Call close() when the stream ends
+        """
+        subscription = Subscription(self, channels)
+        # No history here: an id this process didn't issue (an earlier process, or another worker) can't be resumed
+        if last_event_id and not self._first_id <= last_event_id <= self._last_id:
+            subscription.request_resync()
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+    def subscriber_count(self):
+        with self._lock:
+            return len({s for subscribers in self._subscribers.values() for s in subscribers})
+
+    def _deliver(self, channel, event):
+        with self._lock:
+            for subscription in self._subscribers.get(channel, ()):
+                subscription.put(event)
+
+
+class SQLiteBroker(LocalBroker):
+    """
+    Broker shared by the worker processes on one host through a SQLite file
+
+    publish() appends to an events table; one poller thread per process reads
+    new rows and hands them to that process's subscribers. Rows are kept for
+    retention_seconds so a reconnecting client can replay from Last-Event-ID;
+    publishers prune older rows, so the file stays bounded even in processes
+    that never have subscribers.
+
+    Args:
+        path: SQLite file path
+        poll_interval: Seconds between polls while there are subscribers
+        retention_seconds: How long published events are kept
+    """
+
+    def __init__(self, path, poll_interval=0.5, retention_seconds=600):
+        super().__init__()
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention_seconds = retention_seconds
+        self._local = threading.local()
+        self._poller = None
+        self._poller_lock = threading.Lock()
+        self._last_pruned = 0.0
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS events (id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT NOT NULL, '
+                'type TEXT NOT NULL, data TEXT NOT NULL, created_at REAL NOT NULL)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS ix_events_channel_id ON events (channel, id)')
+            connection.execute('CREATE INDEX IF NOT EXISTS ix_events_created_at ON events (created_at)')
+            # Start ids at the epoch so they keep increasing if the file is deleted and recreated
+            connection.execute(
+                "INSERT INTO sqlite_sequence (name, seq) SELECT 'events', ? "
+                "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'events')",
+                (epoch_event_id(),)
+            )
+            self._local.connection = connection
+        return connection
+
+    def publish(self, channel, event_type, data):
+        connection = self._connection()
+        now = time.time()
+        connection.execute(
+            'INSERT INTO events (channel, type, data, created_at) VALUES (?, ?, ?, ?)',
+            (channel, event_type, json.dumps(data), now)
+        )
+        if now - self._last_pruned > PRUNE_INTERVAL_SECONDS:
+            self._last_pruned = now
+            connection.execute('DELETE FROM events WHERE created_at < ?', (now - self.retention_seconds,))
+
+    def subscribe(self, channels, last_event_id=None):
+        self._start_poller()
+        subscription = Subscription(self, channels)
+        with self._lock:
+            if last_event_id:
+                oldest = self._connection().execute('SELECT MIN(id) FROM events').fetchone()[0]
+                if oldest is None or oldest > last_event_id + 1:
+                    # Events after last_event_id were pruned, or the id came from an earlier file
+                    subscription.request_resync()
+                placeholders = ','.join('?' * len(subscription.channels))
+                rows = self._connection().execute(
+                    f'SELECT id, channel, type, data FROM events WHERE channel IN ({placeholders}) AND id > ? '
+                    f'ORDER BY id LIMIT {SUBSCRIBER_QUEUE_SIZE + 1}',
+                    (*subscription.channels, last_event_id)
+                ).fetchall()
+                for row in rows:
+                    subscription.put(self._event(row))
+            for channel in subscription.channels:
+                self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    @staticmethod
+    def _event(row):
+        return {'id': row[0], 'type': row[2], 'data': json.loads(row[3])}
+
+    def _start_poller(self):
+        with self._poller_lock:
+            if self._poller is None or not self._poller.is_alive():
+                # Read the starting point before any subscriber is registered, so nothing falls in between
+                last_id = self._connection().execute('SELECT COALESCE(MAX(id), 0) FROM events').fetchone()[0]
+                self._poller = threading.Thread(target=self._poll, args=(last_id,), name='sse-event-poller',
+                                                daemon=True)
+                self._poller.start()
+
+    def _poll(self, last_id):
+        connection = self._connection()
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                # subscribe() registers under the same lock, so no event falls between
+                # skipping to MAX(id) and the first subscriber arriving
+                with self._lock:
+                    if not self._subscribers:
+                        # Skip events nobody here is listening for
+                        last_id = connection.execute('SELECT COALESCE(MAX(id), 0) FROM events').fetchone()[0]
+                        continue
+                rows = connection.execute(
+                    'SELECT id, channel, type, data FROM events WHERE id > ? ORDER BY id', (last_id,)
+                ).fetchall()
+                for row in rows:
+                    self._deliver(row[1], self._event(row))
+                    last_id = row[0]
+            except sqlite3.Error as e:
+                print(f"Event broker poll failed: {e}")
+
+
+def epoch_event_id():
+    """Current time in microseconds: a first event id above any a previous process issued"""
+    return int(time.time() * 1_000_000)
+
+
+def broker_from_env():
+    """SQLiteBroker unless EVENT_BROKER=local"""
+    if os.getenv('EVENT_BROKER', 'sqlite').lower() == 'local':
+        return LocalBroker()
+    return SQLiteBroker(os.getenv('EVENT_BROKER_DB', os.path.join(tempfile.gettempdir(), 'calmnest_events.db')))
+
+
+def format_event(event):
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'], separators=(',', ':'))}\n\n"
+
+
+async def event_stream(subscription, heartbeat_seconds=HEARTBEAT_SECONDS, max_seconds=MAX_STREAM_SECONDS):
+    """
+    SSE body for a subscription, for an ASGI streaming response
+
+    Waits on an asyncio.Event set by the publishing thread, so an idle
+    stream holds no thread. Comment lines keep proxies from closing an idle
+    connection. The stream ends after max_seconds so load balancers can
+    rebalance; EventSource reconnects on its own and resumes from Last-Event-ID.
+    """
+    loop = asyncio.get_running_loop()
+    wakeup = asyncio.Event()
+    subscription.on_put = lambda: loop.call_soon_threadsafe(wakeup.set)
+    deadline = loop.time() + max_seconds
+    try:
+        yield f"retry: {RECONNECT_MS}\n\n"
+        while loop.time() < deadline:
+            wakeup.clear()
+            event = subscription.get_nowait()
+            if event is None:
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=min(heartbeat_seconds, max(deadline - loop.time(), 0)))
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                continue
+            yield format_event(event)
+            if event['type'] == 'resync':
+                return
+    finally:
+        subscription.close()
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Columnar exports of anonymised analytics tables
+
+Writes test submissions, Mood Groove results, facial analysis session
+aggregates and comprehensive assessment scores to Parquet (default) or
+Arrow IPC files, so offline analysis reads files instead of calling the API.
+
+Rows are read through a server-side cursor and written EXPORT_BATCH_SIZE at
+a time as record batches, so memory stays bounded whatever the table size.
+Reads go to a read replica when one is configured.
+
+Users appear only as user_key, an HMAC-SHA256 of the user id under
+EXPORT_HMAC_KEY: stable across tables and runs, so joins still work, but not
+reversible without the key. Rotating the key changes every user_key. Free
+text, emails, answers text and raw frames are never exported.
+
+Exports are incremental. Each table has a (timestamp, id) watermark in
+<export dir>/export_state.json, and a run exports only the rows after it,
+each run into its own file under <export dir>/<table>/. Rows younger than
+EXPORT_LAG_SECONDS are left for the next run, so a row committed late (or
+not yet on the replica) isn't skipped. Test submissions (rewritten by
+`scoring.py rescore`) and comprehensive assessments are exported by
+updated_at, so a row changed after it was exported appears again in a later
+file: keep the row with the latest updated_at per id.
+
+Usage:
+    EXPORT_HMAC_KEY=... python export.py                          # every table, since the last run
+    python export.py --tables test_submission --format arrow
+    python export.py --full --export-dir /data/calmnest          # ignore watermarks
+
+Keep to one format per export directory, so each table directory reads as
+one dataset. Needs the pyarrow package.
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+from sqlalchemy import select, tuple_
+from database import db
+from models import ComprehensiveAssessment, FacialAnalysisSession, MoodGrooveResult, Profile, TestSubmission
+from routing import healthy_replicas
+
+EXPORT_DIR = os.getenv('EXPORT_DIR', 'exports')
+BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 10000))
+LAG_SECONDS = int(os.getenv('EXPORT_LAG_SECONDS', 300))
+STATE_FILE = 'export_state.json'
+FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+
+def _profile_id_for_email(email_column):
+    # Email-keyed tables get the same user_key as the id-keyed ones when the email has a profile
+    return select(Profile.id).where(Profile.email == email_column).limit(1).scalar_subquery()
+
+
+def _tables():
+    """
+    {table: (watermark column, id column, [(output column, type, SQL expression)])}
+
+    Types: int, float, string, timestamp, user (pseudonymised), item_scores
+    (per-question scores pulled out of an answers list).
+    """
+    ts, mg, fa, ca = TestSubmission, MoodGrooveResult, FacialAnalysisSession, ComprehensiveAssessment
+    return {
+        'test_submission': (ts.updated_at, ts.id, [
+            ('id', 'int', ts.id), ('user_key', 'user', ts.user_id), ('test_type', 'string', ts.test_type),
+            ('score', 'int', ts.score), ('severity', 'string', ts.severity),
+            ('item_scores', 'item_scores', ts.answers), ('timestamp', 'timestamp', ts.timestamp),
+            ('updated_at', 'timestamp', ts.updated_at),
+        ]),
+        'mood_groove_result': (mg.timestamp, mg.id, [
+            ('id', 'int', mg.id), ('user_key', 'user', mg.user_id), ('dominant_mood', 'string', mg.dominant_mood),
+            ('confidence', 'float', mg.confidence), ('depression', 'float', mg.depression),
+            ('anxiety', 'float', mg.anxiety), ('timestamp', 'timestamp', mg.timestamp),
+        ]),
+        'facial_analysis_session': (fa.timestamp, fa.id, [
+            ('id', 'int', fa.id), ('user_key', 'user', _profile_id_for_email(fa.user_email).label('user')),
+            ('session_start_time', 'timestamp', fa.session_start_time),
+            ('session_end_time', 'timestamp', fa.session_end_time),
+            ('total_detections', 'int', fa.total_detections), ('dominant_mood', 'string', fa.dominant_mood),
+            ('avg_confidence', 'float', fa.avg_confidence), ('avg_depression', 'float', fa.avg_depression),
+            ('avg_anxiety', 'float', fa.avg_anxiety), ('timestamp', 'timestamp', fa.timestamp),
+        ]),
+        'comprehensive_assessment': (ca.updated_at, ca.id, [
+            ('id', 'int', ca.id), ('user_key', 'user', ca.user_id), ('status', 'string', ca.status),
+            ('started_at', 'timestamp', ca.started_at), ('completed_at', 'timestamp', ca.completed_at),
+            ('phq9_score', 'int', ca.phq9_score), ('phq9_severity', 'string', ca.phq9_severity),
+            ('gad7_score', 'int', ca.gad7_score), ('gad7_severity', 'string', ca.gad7_severity),
+            ('mood_groove_dominant_mood', 'string', ca.mood_groove_dominant_mood),
+            ('mood_groove_depression', 'float', ca.mood_groove_depression),
+            ('mood_groove_anxiety', 'float', ca.mood_groove_anxiety),
+            ('resilience_score', 'int', ca.resilience_score), ('stress_score', 'int', ca.stress_score),
+            ('sleep_quality_score', 'int', ca.sleep_quality_score),
+            ('social_support_score', 'int', ca.social_support_score),
+            ('overall_severity', 'string', ca.overall_severity), ('risk_level', 'string', ca.risk_level),
+            ('recommendation_set_id', 'int', ca.recommendation_set_id),
+            ('timestamp', 'timestamp', ca.timestamp), ('updated_at', 'timestamp', ca.updated_at),
+        ]),
+    }
+
+
+EXPORT_TABLES = tuple(_tables())
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise RuntimeError("Exports need pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+def _arrow_type(pa, kind):
+    return {
+        'int': pa.int64(), 'float': pa.float64(), 'string': pa.string(), 'user': pa.string(),
+        'timestamp': pa.timestamp('us'), 'item_scores': pa.list_(pa.int8()),
+    }[kind]
+
+
+ITEM_SCORE_RANGE = range(-128, 128)  # Stored as int8
+
+
+def _item_scores(answers):
+    """Per-question scores from an answers list, or None if they can't all be read as int8"""
+    if not isinstance(answers, list):
+        return None
+    try:
+        scores = [int(a.get('score') if isinstance(a, dict) else a) for a in answers]
+    except (TypeError, ValueError, OverflowError):
+        return None
+    return scores if all(score in ITEM_SCORE_RANGE for score in scores) else None
+
+
+class Pseudonymizer:
+    """Keyed, stable pseudonyms for user ids"""
+
+    def __init__(self, key):
+        self._key = key.encode()
+        self._memo = {}
+
+    def __call__(self, user):
+        if user is None:
+            return None
+        pseudonym = self._memo.get(user)
+        if pseudonym is None:
+            if len(self._memo) >= 100000:
+                self._memo.clear()
+            pseudonym = hmac.new(self._key, str(user).encode(), hashlib.sha256).hexdigest()[:32]
+            self._memo[user] = pseudonym
+        return pseudonym
+
+
+def source_engine():
+    """A healthy read replica if one is configured, otherwise the primary"""
+    replicas = healthy_replicas(db.engines)
+    return db.engines[replicas[0]] if replicas else db.engine
+
+
+def load_state(export_dir):
+    path = os.path.join(export_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(export_dir, state):
+    path = os.path.join(export_dir, STATE_FILE)
+    with open(f"{path}.tmp", 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+
+def _open_writer(pa, fmt, path, schema):
+    if fmt == 'parquet':
+        writer = pa.parquet.ParquetWriter(path, schema, compression='zstd')
+        return writer, writer.close
+    sink = pa.OSFile(path, 'wb')
+    writer = pa.ipc.new_file(sink, schema)
+
+    def close():
+        writer.close()
+        sink.close()
+    return writer, close
+
+
+def export_table(table_name, export_dir, pseudonymize, fmt='parquet', state=None, full=False,
+                 batch_size=BATCH_SIZE, lag_seconds=LAG_SECONDS):
+    """
+    Export one table's rows after its watermark into a new file
+
+    Returns:
+        dict: Manifest entry for the file ({'file', 'rows', ...}), or None if there were no new rows
+    """
+    pa = _pyarrow()
+    watermark_column, id_column, columns = _tables()[table_name]
+    schema = pa.schema([(name, _arrow_type(pa, kind)) for name, kind, _ in columns])
+    watermark = None if full or state is None else state.get(table_name, {}).get('watermark')
+    cutoff = datetime.utcnow() - timedelta(seconds=lag_seconds)
+
+    query = select(
+        *[expression for _, _, expression in columns],
+        watermark_column.label('_watermark'), id_column.label('_watermark_id')
+    ).where(watermark_column.isnot(None), watermark_column < cutoff)
+    if watermark:
+        query = query.where(tuple_(watermark_column, id_column) >
+                            tuple_(datetime.fromisoformat(watermark['timestamp']), watermark['id']))
+    query = query.order_by(watermark_column, id_column)
+
+    table_dir = os.path.join(export_dir, table_name)
+    os.makedirs(table_dir, exist_ok=True)
+    path = os.path.join(table_dir, f"{table_name}-{datetime.utcnow():%Y%m%dT%H%M%S}{FORMATS[fmt]}")
+    tmp_path = f"{path}.tmp"
+    writer, close, rows, last = None, None, 0, None
+
+    try:
+        with source_engine().connect() as connection:
+            result = connection.execution_options(stream_results=True, yield_per=batch_size).execute(query)
+            for partition in result.partitions():
+                arrays = []
+                for i, (_, kind, _) in enumerate(columns):
+                    values = [row[i] for row in partition]
+                    if kind == 'user':
+                        values = [pseudonymize(value) for value in values]
+                    elif kind == 'item_scores':
+                        values = [_item_scores(value) for value in values]
+                    arrays.append(pa.array(values, type=schema.field(i).type))
+                if writer is None:
+                    writer, close = _open_writer(pa, fmt, tmp_path, schema)
+                writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+                rows += len(partition)
+                last = partition[-1]
+        if writer is None:
+            return None
+        close()
+        writer = None
+        os.replace(tmp_path, path)
+    finally:
+        if writer is not None:
+            close()
+            os.remove(tmp_path)
+
+    return {
+        'file': os.path.relpath(path, export_dir),
+        'rows': rows,
+        'from': watermark,
+        'watermark': {'timestamp': last._watermark.isoformat(), 'id': last._watermark_id},
+        'exported_at': datetime.utcnow().isoformat(),
+    }
+
+
+def run_export(tables, export_dir=EXPORT_DIR, fmt='parquet', full=False, key=None):
+    """
+    Export tables and advance their watermarks; the state is saved after each table
+
+    Returns:
+        dict: {table: manifest entry or None}
+    """
+    key = key or os.getenv('EXPORT_HMAC_KEY')
+    if not key:
+        raise RuntimeError("Set EXPORT_HMAC_KEY to pseudonymise user ids")
+    os.makedirs(export_dir, exist_ok=True)
+    state = load_state(export_dir)
+    pseudonymize = Pseudonymizer(key)
+    results = {}
+    for table_name in tables:
+        entry = export_table(table_name, export_dir, pseudonymize, fmt=fmt, state=state, full=full)
+        results[table_name] = entry
+        if entry is None:
+            continue
+        table_state = state.setdefault(table_name, {'files': []})
+        table_state['watermark'] = entry['watermark']
+        table_state['files'].append(entry)
+        save_state(export_dir, state)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export anonymised analytics tables to Parquet or Arrow files')
+    parser.add_argument('--tables', default=','.join(EXPORT_TABLES),
+                        help=f"Comma-separated subset of {', '.join(EXPORT_TABLES)}")
+    parser.add_argument('--format', choices=sorted(FORMATS), default='parquet')
+    parser.add_argument('--export-dir', default=EXPORT_DIR)
+    parser.add_argument('--full', action='store_true', help='Export every row, ignoring watermarks')
+    args = parser.parse_args()
+
+    tables = [name.strip() for name in args.tables.split(',') if name.strip()]
+    unknown = [name for name in tables if name not in EXPORT_TABLES]
+    if unknown:
+        print(f"❌ Unknown table(s): {', '.join(unknown)}")
+        sys.exit(2)
+
+    from app import app
+
+    try:
+        with app.app_context():
+            print(f"📦 Exporting {', '.join(tables)} to {args.export_dir} ({args.format})...")
+            for table_name, entry in run_export(tables, args.export_dir, args.format, args.full).items():
+                if entry:
+                    print(f"✅ {table_name}: {entry['rows']} rows -> {entry['file']}")
+                else:
+                    print(f"⏭️  {table_name}: no new rows")
+    except Exception as e:
+        print(f"❌ Export failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Idempotency-Key support for the ingestion routes
+
+A client that may retry a POST sends a unique Idempotency-Key header (a
+UUID per logical submission). The first request claims the key with
+INSERT ... ON CONFLICT DO NOTHING in the same transaction as the row it
+creates, so the claim and the row commit or roll back together; the
+response is stored on the claim afterwards. A retry with the same key and
+body gets the stored response back without touching the table again, and
+concurrent duplicates wait on the unique index rather than both inserting.
+
+Requests without the header behave as before.
+
+Usage:
+    python idempotency.py purge     # delete keys older than IDEMPOTENCY_KEY_TTL_HOURS
+"""
+import hashlib
+import os
+import sys
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import jsonify, request
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from database import db
+from models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+KEY_TTL_HOURS = int(os.getenv('IDEMPOTENCY_KEY_TTL_HOURS', 24))
+IN_PROGRESS_RETRY_AFTER = 1
+
+
+def request_fingerprint():
+    return hashlib.sha256(request.get_data() or b'').hexdigest()
+
+
+def _claim(scope, key, fingerprint):
+    """
+    Insert the key row in the current transaction
+
+    Returns:
+        bool: False if the key was already claimed
+    """
+    values = {'scope': scope, 'key': key, 'request_hash': fingerprint, 'created_at': datetime.utcnow()}
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        dialect_insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        statement = dialect_insert(IdempotencyKey).values(**values).on_conflict_do_nothing(
+            index_elements=['scope', 'key']
+        )
+        return db.session.execute(statement).rowcount == 1
+    try:
+        with db.session.begin_nested():
+            db.session.execute(insert(IdempotencyKey).values(**values))
+        return True
+    except IntegrityError:
+        return False
+
+
+def _replay(scope, key, fingerprint):
+    stored = IdempotencyKey.query.filter_by(scope=scope, key=key).first()
+    if stored is None:
+        # The claim was rolled back after we looked; the client should simply retry
+        return _in_progress()
+    if stored.request_hash != fingerprint:
+        return jsonify({'error': f'{HEADER} was already used with a different request body'}), 422
+    if stored.status_code is None:
+        return _in_progress()
+    response = jsonify(stored.response_body)
+    response.status_code = stored.status_code
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _in_progress():
+    response = jsonify({'error': 'A request with this Idempotency-Key is still being processed'})
+    response.status_code = 409
+    response.headers['Retry-After'] = str(IN_PROGRESS_RETRY_AFTER)
+    return response
+
+
+def idempotent(scope):
+    """
+    Make a POST view retry-safe when the client sends an Idempotency-Key
+
+    The view must commit its own writes; the key claim rides along in that
+    commit. Only 2xx responses are stored, so a failed request can be retried
+    with the same key.
+
+    Args:
+        scope: Name keys are unique within, normally the route
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = request.headers.get(HEADER)
+            if not key:
+                return view(*args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return jsonify({'error': f'{HEADER} must be at most {MAX_KEY_LENGTH} characters'}), 400
+
+            fingerprint = request_fingerprint()
+            try:
+                claimed = _claim(scope, key, fingerprint)
+            except Exception as e:
+                db.session.rollback()
+                print(f"Idempotency key claim failed for {scope}: {e}")
+                return jsonify({'error': 'Failed to record Idempotency-Key'}), 500
+            if not claimed:
+                db.session.rollback()
+                return _replay(scope, key, fingerprint)
+
+            response = view(*args, **kwargs)
+            status_code, body = _status_and_body(response)
+            if not 200 <= status_code < 300:
+                # Rejected before commit: release the claim with whatever else is pending
+                db.session.rollback()
+                return response
+            try:
+                IdempotencyKey.query.filter_by(scope=scope, key=key).update(
+                    {'status_code': status_code, 'response_body': body}
+                )
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Failed to store response for {HEADER} {key}: {e}")
+            return response
+        return wrapper
+    return decorator
+
+
+def _status_and_body(response):
+    if isinstance(response, tuple):
+        body, status_code = response[0], response[1]
+        return status_code, body.get_json()
+    return response.status_code, response.get_json()
+
+
+def purge_expired(ttl_hours=KEY_TTL_HOURS):
+    """Delete keys older than ttl_hours; returns the number of rows removed"""
+    cutoff = datetime.utcnow() - timedelta(hours=ttl_hours)
+    deleted = IdempotencyKey.query.filter(IdempotencyKey.created_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
+
+
+def main():
+    from app import app
+
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command != 'purge':
+        print("Usage: python idempotency.py purge")
+        sys.exit(2)
+    with app.app_context():
+        print(f"🧹 Deleted {purge_expired()} idempotency key(s) older than {KEY_TTL_HOURS}h")
+
+
+if __name__ == "__main__":
+    main()
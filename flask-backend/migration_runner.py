@@ -0,0 +1,231 @@
+"""
+Versioned schema migration runner
+
+Migrations are registered with the @migration decorator, applied in version
+order and recorded in the schema_migrations table. On PostgreSQL a session
+advisory lock keeps two runs from overlapping, and every DDL statement runs
+with a lock_timeout so a migration waiting behind a long transaction fails
+fast instead of queueing all traffic behind it.
+
+The helpers on MigrationContext are online-safe and idempotent: nullable
+(or constant-default) column adds, CREATE INDEX CONCURRENTLY, and backfills
+in short batched transactions.
+"""
+import os
+import time
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, text
+
+ADVISORY_LOCK_KEY = 7_261_500_035
+LOCK_TIMEOUT = os.getenv('MIGRATION_LOCK_TIMEOUT', '5s')
+BACKFILL_BATCH_SIZE = int(os.getenv('MIGRATION_BACKFILL_BATCH_SIZE', 1000))
+
+history_metadata = MetaData()
+schema_migrations = Table(
+    'schema_migrations', history_metadata,
+    Column('version', String(20), primary_key=True),
+    Column('description', String(255), nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+    Column('duration_ms', Integer, nullable=False),
+)
+
+MIGRATIONS = []
+
+
+class MigrationLockError(Exception):
+    """Raised when another migration run holds the advisory lock"""
+
+
+def migration(version, description):
+    """Register a migration function; functions receive a MigrationContext"""
+    def decorator(func):
+        if any(m[0] == version for m in MIGRATIONS):
+            raise ValueError(f"Duplicate migration version {version}")
+        MIGRATIONS.append((version, description, func))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return func
+    return decorator
+
+
+class MigrationContext:
+    """Online-safe schema operations available to migrations"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.is_postgres = engine.dialect.name == 'postgresql'
+
+    def _begin(self):
+        connection = self.engine.connect()
+        transaction = connection.begin()
+        if self.is_postgres:
+            connection.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+        return connection, transaction
+
+    def execute(self, sql, params=None):
+        """Run one statement in its own short transaction"""
+        connection, transaction = self._begin()
+        try:
+            result = connection.execute(text(sql), params or {})
+            transaction.commit()
+            return result
+        except Exception:
+            transaction.rollback()
+            raise
+        finally:
+            connection.close()
+
+    def has_table(self, table):
+        return inspect(self.engine).has_table(table)
+
+    def has_column(self, table, column):
+        return self.has_table(table) and column in {c['name'] for c in inspect(self.engine).get_columns(table)}
+
+    def has_index(self, table, name):
+        return self.has_table(table) and name in {i['name'] for i in inspect(self.engine).get_indexes(table)}
+
+    def add_column(self, table, column, ddl_type, default=None, nullable=True):
+        """
+        Add a column if it is missing
+
+        Columns must be nullable or carry a constant default, which PostgreSQL
+        adds without rewriting the table.
+        """
+        if self.has_column(table, column):
+            print(f"   {table}.{column} already exists")
+            return False
+        if not nullable and default is None:
+            raise ValueError(f"NOT NULL column {table}.{column} needs a constant default to be added online")
+        ddl = f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"
+        if default is not None:
+            ddl += f" DEFAULT {default}"
+        if not nullable:
+            ddl += " NOT NULL"
+        self.execute(ddl)
+        print(f"   added {table}.{column}")
+        return True
+
+    def create_index(self, name, table, columns, unique=False):
+        """
+        Create an index without blocking writes
+
+        On PostgreSQL this is CREATE INDEX CONCURRENTLY outside a transaction;
+        an invalid index left by an interrupted concurrent build is dropped and
+        rebuilt. Partitioned tables do not support CONCURRENTLY, so their index
+        is built on the parent in the ordinary way.
+        """
+        unique_sql = 'UNIQUE ' if unique else ''
+        column_sql = ', '.join(columns)
+        if not self.is_postgres:
+            self.execute(f"CREATE {unique_sql}INDEX IF NOT EXISTS {name} ON {table} ({column_sql})")
+            print(f"   index {name} is in place")
+            return
+
+        with self.engine.connect() as connection:
+            invalid = connection.execute(text("""
+                SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+                WHERE c.relname = :name AND NOT i.indisvalid
+            """), {'name': name}).first()
+            partitioned = connection.execute(text("""
+                SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid
+                WHERE c.relname = :table
+            """), {'table': table}).first()
+
+        # CONCURRENTLY can't run in a transaction, so SET LOCAL isn't available: reset the
+        # session setting before the connection goes back to the pool
+        autocommit = self.engine.connect().execution_options(isolation_level='AUTOCOMMIT')
+        try:
+            autocommit.execute(text(f"SET lock_timeout = '{LOCK_TIMEOUT}'"))
+            if invalid:
+                autocommit.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+            concurrently = '' if partitioned else 'CONCURRENTLY '
+            autocommit.execute(text(f"CREATE {unique_sql}INDEX {concurrently}IF NOT EXISTS {name} ON {table} ({column_sql})"))
+        finally:
+            try:
+                autocommit.execute(text("RESET lock_timeout"))
+            except Exception as e:
+                # A broken connection is discarded by the pool anyway
+                print(f"   could not reset lock_timeout: {e}")
+            autocommit.close()
+        print(f"   index {name} is in place")
+
+    def backfill(self, table, set_sql, where_sql, params=None, batch_size=BACKFILL_BATCH_SIZE):
+        """
+        UPDATE rows matching where_sql in batches, one short transaction per batch
+
+        where_sql must stop matching a row once it has been updated.
+
+        Returns:
+            int: Number of rows updated
+        """
+        total = 0
+        while True:
+            result = self.execute(f"""
+                UPDATE {table} SET {set_sql}
+                WHERE id IN (SELECT id FROM {table} WHERE {where_sql} LIMIT :batch_size)
+            """, {**(params or {}), 'batch_size': batch_size})
+            if not result.rowcount:
+                break
+            total += result.rowcount
+        if total:
+            print(f"   backfilled {total} rows in {table}")
+        return total
+
+
+class MigrationRunner:
+    def __init__(self, engine):
+        self.engine = engine
+        self.context = MigrationContext(engine)
+
+    def applied_versions(self):
+        history_metadata.create_all(self.engine)
+        with self.engine.connect() as connection:
+            return {row.version for row in connection.execute(schema_migrations.select())}
+
+    def pending(self):
+        applied = self.applied_versions()
+        return [m for m in MIGRATIONS if m[0] not in applied]
+
+    def _acquire_lock(self, connection):
+        if not self.context.is_postgres:
+            return
+        acquired = connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {'key': ADVISORY_LOCK_KEY}).scalar()
+        connection.commit()
+        if not acquired:
+            raise MigrationLockError("Another migration run is in progress")
+
+    def _release_lock(self, connection):
+        if self.context.is_postgres:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {'key': ADVISORY_LOCK_KEY})
+            connection.commit()
+
+    def run(self):
+        """
+        Apply pending migrations in version order
+
+        Returns:
+            list: Versions applied in this run
+        """
+        applied = []
+        with self.engine.connect() as lock_connection:
+            self._acquire_lock(lock_connection)
+            try:
+                # Re-read history under the lock in case another run just finished
+                for version, description, func in self.pending():
+                    print(f"▶️  {version} {description}")
+                    started = time.monotonic()
+                    func(self.context)
+                    with self.engine.begin() as connection:
+                        connection.execute(schema_migrations.insert().values(
+                            version=version,
+                            description=description,
+                            applied_at=datetime.utcnow(),
+                            duration_ms=int((time.monotonic() - started) * 1000)
+                        ))
+                    applied.append(version)
+            finally:
+                self._release_lock(lock_connection)
+        return applied
+
+    def status(self):
+        applied = self.applied_versions()
+        return [(version, description, version in applied) for version, description, _ in MIGRATIONS]
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Versioned schema migrations for CalmNest
+
+Usage:
+    python migrations.py            # apply pending migrations
+    python migrations.py status     # list migrations and whether they are applied
+
+Add new migrations at the bottom with the next version number. Use the
+MigrationContext helpers so each step is idempotent and online-safe.
+"""
+
+import sys
+from migration_runner import MigrationLockError, MigrationRunner, migration
+
+
+@migration('0001', 'Create base tables')
+def create_base_tables(ctx):
+    from database import db
+    # Only creates tables that are missing; existing tables are left untouched
+    db.metadata.create_all(ctx.engine)
+
+
+@migration('0002', 'Add mood_groove_result.user_email')
+def add_mood_groove_user_email(ctx):
+    ctx.add_column('mood_groove_result', 'user_email', 'VARCHAR(255)')
+
+
+@migration('0003', 'Add email to the legacy profiles table')
+def add_legacy_profiles_email(ctx):
+    if ctx.has_table('profiles'):
+        ctx.add_column('profiles', 'email', 'VARCHAR(255)')
+
+
+@migration('0004', 'Add feedback.user_name')
+def add_feedback_user_name(ctx):
+    ctx.add_column('feedback', 'user_name', 'VARCHAR(100)', default="'Anonymous'")
+    ctx.backfill('feedback', "user_name = 'Anonymous'", 'user_name IS NULL')
+
+
+@migration('0005', 'Add forum_post.category')
+def add_forum_post_category(ctx):
+    ctx.add_column('forum_post', 'category', 'VARCHAR(50)', default="'General'")
+    ctx.backfill('forum_post', "category = 'General'", 'category IS NULL')
+
+
+@migration('0006', 'Index forum_post on (is_approved, category, timestamp)')
+def index_forum_post_category(ctx):
+    ctx.create_index('ix_forum_post_approved_category_timestamp', 'forum_post',
+                     ['is_approved', 'category', 'timestamp'])
+
+
+@migration('0007', 'Add chat_log.conversation_id and its history index')
+def add_chat_log_conversation(ctx):
+    ctx.add_column('chat_log', 'conversation_id', 'VARCHAR(100)', default="'default'", nullable=False)
+    ctx.create_index('ix_chat_log_user_conversation_timestamp', 'chat_log',
+                     ['user_id', 'conversation_id', 'timestamp'])
+
+
+@migration('0008', 'Index per-user history tables on (user, timestamp) for date ranges')
+def index_history_by_user_timestamp(ctx):
+    ctx.create_index('ix_test_submission_user_timestamp', 'test_submission', ['user_id', 'timestamp'])
+    ctx.create_index('ix_mood_groove_result_user_timestamp', 'mood_groove_result', ['user_id', 'timestamp'])
+    ctx.create_index('ix_mood_groove_result_email_timestamp', 'mood_groove_result', ['user_email', 'timestamp'])
+    ctx.create_index('ix_breathing_exercise_log_user_timestamp', 'breathing_exercise_log', ['user_id', 'timestamp'])
+    ctx.create_index('ix_facial_analysis_session_email_timestamp', 'facial_analysis_session',
+                     ['user_email', 'timestamp'])
+    ctx.create_index('ix_comprehensive_assessment_user_timestamp', 'comprehensive_assessment',
+                     ['user_id', 'timestamp'])
+
+
+@migration('0009', 'Add comprehensive_assessment.updated_at for the dashboard changes feed')
+def add_comprehensive_assessment_updated_at(ctx):
+    ctx.add_column('comprehensive_assessment', 'updated_at', 'TIMESTAMP')
+    ctx.backfill('comprehensive_assessment', 'updated_at = COALESCE(completed_at, started_at, timestamp)',
+                 'updated_at IS NULL AND COALESCE(completed_at, started_at, timestamp) IS NOT NULL')
+    ctx.create_index('ix_comprehensive_assessment_user_updated', 'comprehensive_assessment',
+                     ['user_id', 'updated_at', 'id'])
+
+
+@migration('0010', 'Index profile.email and add cache_version for the profile cache')
+def add_profile_cache_support(ctx):
+    from database import db
+    from models import CacheVersion
+    ctx.create_index('ix_profile_email', 'profile', ['email'])
+    db.metadata.create_all(ctx.engine, tables=[CacheVersion.__table__])
+
+
+@migration('0011', 'Create idempotency_key for retry-safe ingestion')
+def create_idempotency_key(ctx):
+    from database import db
+    from models import IdempotencyKey
+    # Creates the table together with its unique (scope, key) index
+    db.metadata.create_all(ctx.engine, tables=[IdempotencyKey.__table__])
+
+
+@migration('0012', 'Create purge_job and index the per-user tables it deletes from')
+def create_purge_job(ctx):
+    from database import db
+    from models import PurgeJob
+    db.metadata.create_all(ctx.engine, tables=[PurgeJob.__table__])
+    ctx.create_index('ix_facial_analysis_upload_email', 'facial_analysis_upload', ['user_email'])
+    ctx.create_index('ix_user_interaction_user', 'user_interaction', ['user_id'])
+    ctx.create_index('ix_assessment_session_user', 'assessment_session', ['user_id'])
+
+
+@migration('0013', 'Create recommendation_set and reference it from comprehensive_assessment')
+def create_recommendation_set(ctx):
+    from database import db
+    from models import RecommendationSet
+    db.metadata.create_all(ctx.engine, tables=[RecommendationSet.__table__])
+    if ctx.is_postgres:
+        # Add the constraint NOT VALID and validate it separately, so neither step blocks writes for long
+        if ctx.add_column('comprehensive_assessment', 'recommendation_set_id', 'INTEGER'):
+            ctx.execute('ALTER TABLE comprehensive_assessment ADD CONSTRAINT '
+                        'comprehensive_assessment_recommendation_set_id_fkey FOREIGN KEY (recommendation_set_id) '
+                        'REFERENCES recommendation_set (id) NOT VALID')
+            ctx.execute('ALTER TABLE comprehensive_assessment VALIDATE CONSTRAINT '
+                        'comprehensive_assessment_recommendation_set_id_fkey')
+    else:
+        ctx.add_column('comprehensive_assessment', 'recommendation_set_id', 'INTEGER REFERENCES recommendation_set (id)')
+
+
+@migration('0014', 'Index exported tables on their (timestamp, id) watermark')
+def index_export_watermarks(ctx):
+    ctx.create_index('ix_test_submission_timestamp_id', 'test_submission', ['timestamp', 'id'])
+    ctx.create_index('ix_mood_groove_result_timestamp_id', 'mood_groove_result', ['timestamp', 'id'])
+    ctx.create_index('ix_facial_analysis_session_timestamp_id', 'facial_analysis_session', ['timestamp', 'id'])
+    ctx.create_index('ix_comprehensive_assessment_updated_id', 'comprehensive_assessment', ['updated_at', 'id'])
+
+
+@migration('0015', 'Add test_submission.updated_at so rescored rows can be picked up incrementally')
+def add_test_submission_updated_at(ctx):
+    ctx.add_column('test_submission', 'updated_at', 'TIMESTAMP')
+    ctx.backfill('test_submission', 'updated_at = timestamp', 'updated_at IS NULL AND timestamp IS NOT NULL')
+
+
+@migration('0016', 'Index test_submission for the dashboard changes feed')
+def index_test_submission_updated(ctx):
+    ctx.create_index('ix_test_submission_user_updated', 'test_submission', ['user_id', 'updated_at', 'id'])
+
+
+@migration('0017', 'Index test_submission on its (updated_at, id) export watermark')
+def index_test_submission_export_watermark(ctx):
+    ctx.create_index('ix_test_submission_updated_id', 'test_submission', ['updated_at', 'id'])
+
+
+@migration('0018', 'Create and seed feedback_rating_aggregate from featured feedback')
+def seed_feedback_rating_aggregate(ctx):
+    from database import db
+    from models import FeedbackRatingAggregate
+    db.metadata.create_all(ctx.engine, tables=[FeedbackRatingAggregate.__table__])
+    # Stars that already have a row are kept; bump_feedback_rating has been maintaining them
+    for star in range(1, 6):
+        ctx.execute('INSERT INTO feedback_rating_aggregate (rating, count) '
+                    'SELECT :star, (SELECT COUNT(*) FROM feedback WHERE is_featured AND rating = :star) '
+                    'WHERE NOT EXISTS (SELECT 1 FROM feedback_rating_aggregate WHERE rating = :star)',
+                    {'star': star})
+
+
+@migration('0019', 'Backfill NULL updated_at so the dashboard changes feed can see every row')
+def backfill_updated_at(ctx):
+    # Rows written by instances that predate updated_at; a NULL never compares after a sync cursor
+    for table in ('test_submission', 'comprehensive_assessment'):
+        ctx.backfill(table, 'updated_at = COALESCE(timestamp, CURRENT_TIMESTAMP)', 'updated_at IS NULL')
+
+
+def main():
+    from app import app, db
+
+    command = sys.argv[1] if len(sys.argv) > 1 else 'up'
+    with app.app_context():
+        runner = MigrationRunner(db.engine)
+
+        if command == 'status':
+            for version, description, applied in runner.status():
+                print(f"{'✅' if applied else '⏳'} {version} {description}")
+            return
+
+        if command != 'up':
+            print(f"Unknown command: {command}. Use 'up' or 'status'.")
+            sys.exit(2)
+
+        print("🚀 Running CalmNest database migrations...")
+        print("=" * 50)
+        try:
+            applied = runner.run()
+        except MigrationLockError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        except Exception as e:
+            print(f"❌ Migration failed: {e}")
+            sys.exit(1)
+
+        print("=" * 50)
+        if applied:
+            print(f"✅ Applied {len(applied)} migration(s): {', '.join(applied)}")
+        else:
+            print("✅ Database is up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,18 @@ class TestSubmission(db.Model):
     severity = db.Column(db.String(100), nullable=False) # e.g., 'Mild', 'Moderate'
     answers = db.Column(db.JSON, nullable=False) # Store all Q&As here
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow) # Bumped when a rescore changes score/severity
+
+    __table_args__ = (
+        # Serves per-user history with since/until ranges on the raw timestamp
+        db.Index('ix_test_submission_user_timestamp', 'user_id', 'timestamp'),
+        # Serves the dashboard changes feed, which tracks rescored rows by (updated_at, id)
+        db.Index('ix_test_submission_user_updated', 'user_id', 'updated_at', 'id'),
+        # Serves table-wide timestamp ranges (analytics)
+        db.Index('ix_test_submission_timestamp_id', 'timestamp', 'id'),
+        # Serves incremental analytics exports, which page the whole table by (updated_at, id)
+        db.Index('ix_test_submission_updated_id', 'updated_at', 'id'),
+    )
 
 class MoodGrooveResult(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -23,13 +35,25 @@ class MoodGrooveResult(db.Model):
     expressions = db.Column(db.JSON, nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_mood_groove_result_user_timestamp', 'user_id', 'timestamp'),
+        db.Index('ix_mood_groove_result_email_timestamp', 'user_email', 'timestamp'),
+        db.Index('ix_mood_groove_result_timestamp_id', 'timestamp', 'id'),
+    )
+
 class ChatLog(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.String, nullable=False)
     message = db.Column(db.Text, nullable=False)
     sender = db.Column(db.String(100), nullable=False) # 'user' or 'bot'
+    conversation_id = db.Column(db.String(100), nullable=False, default='default', server_default='default')
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Serves "last N messages of a conversation" and keyset paging backwards
+        db.Index('ix_chat_log_user_conversation_timestamp', 'user_id', 'conversation_id', 'timestamp'),
+    )
+
 class BreathingExerciseLog(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.String, nullable=False)
@@ -37,6 +61,10 @@ class BreathingExerciseLog(db.Model):
     duration_seconds = db.Column(db.Integer, nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_breathing_exercise_log_user_timestamp', 'user_id', 'timestamp'),
+    )
+
 class ForumPost(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.String, nullable=False)
@@ -47,6 +75,11 @@ class ForumPost(db.Model):
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     is_approved = db.Column(db.Boolean, default=False) # For admin approval
 
+    __table_args__ = (
+        # Serves the approved listing, ?category= filtering and per-category counts
+        db.Index('ix_forum_post_approved_category_timestamp', 'is_approved', 'category', 'timestamp'),
+    )
+
 class Feedback(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.String, nullable=False)
@@ -56,6 +89,11 @@ class Feedback(db.Model):
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     is_featured = db.Column(db.Boolean, default=False) # For admin to feature
 
+class FeedbackRatingAggregate(db.Model):
+    # One row per star (1-5) counting featured feedback; count and sum are derived from these rows
+    rating = db.Column(db.Integer, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
 class UserInteraction(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.String, nullable=False)
@@ -63,6 +101,10 @@ class UserInteraction(db.Model):
     details = db.Column(db.JSON, nullable=True)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_user_interaction_user', 'user_id'),
+    )
+
 class FacialAnalysisSession(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_email = db.Column(db.String(255), nullable=False)
@@ -77,6 +119,43 @@ class FacialAnalysisSession(db.Model):
     raw_data = db.Column(db.JSON, nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_facial_analysis_session_email_timestamp', 'user_email', 'timestamp'),
+        db.Index('ix_facial_analysis_session_timestamp_id', 'timestamp', 'id'),
+    )
+
+class FacialAnalysisUpload(db.Model):
+    # A facial-analysis session uploaded in chunks; aggregates are kept running as frames arrive
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_email = db.Column(db.String(255), nullable=False)
+    session_start_time = db.Column(db.DateTime, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='open')  # open, closed
+    chunk_count = db.Column(db.Integer, nullable=False, default=0)
+    frame_count = db.Column(db.Integer, nullable=False, default=0)
+    confidence_sum = db.Column(db.Float, nullable=False, default=0.0)
+    depression_sum = db.Column(db.Float, nullable=False, default=0.0)
+    anxiety_sum = db.Column(db.Float, nullable=False, default=0.0)
+    mood_counts = db.Column(db.JSON, nullable=False, default=dict)
+    session_id = db.Column(db.Integer, nullable=True)  # FacialAnalysisSession created on close
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # Finds a user's uploads when purging their data
+        db.Index('ix_facial_analysis_upload_email', 'user_email'),
+    )
+
+class FacialAnalysisFrameChunk(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    upload_id = db.Column(db.String(36), nullable=False)
+    seq = db.Column(db.Integer, nullable=False)  # Client-assigned chunk number; retries reuse it
+    frames = db.Column(db.JSON, nullable=False)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('upload_id', 'seq', name='uq_facial_analysis_frame_chunk_upload_seq'),
+    )
+
 class ComprehensiveAssessment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.String, nullable=False)
@@ -114,9 +193,25 @@ class ComprehensiveAssessment(db.Model):
     overall_severity = db.Column(db.String(100), nullable=True)
     risk_level = db.Column(db.String(50), nullable=True)
     analysis_prompt = db.Column(db.Text, nullable=True)
-    recommendations = db.Column(db.JSON, nullable=True)
+    recommendations = db.Column(db.JSON, nullable=True)  # Legacy per-row copy; new rows use recommendation_set_id
+    recommendation_set_id = db.Column(db.Integer, db.ForeignKey('recommendation_set.id'), nullable=True)
     
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_comprehensive_assessment_user_timestamp', 'user_id', 'timestamp'),
+        # Serves the dashboard changes feed, which pages assessments by last update
+        db.Index('ix_comprehensive_assessment_user_updated', 'user_id', 'updated_at', 'id'),
+        db.Index('ix_comprehensive_assessment_updated_id', 'updated_at', 'id'),
+    )
+
+class RecommendationSet(db.Model):
+    # Recommendations generated for one score profile, shared by every assessment with that profile
+    id = db.Column(db.Integer, primary_key=True)
+    profile_key = db.Column(db.String(200), unique=True, nullable=False)  # Includes the generator version
+    recommendations = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class AssessmentSession(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -125,6 +220,10 @@ class AssessmentSession(db.Model):
     current_step = db.Column(db.String(100), nullable=False)
     session_data = db.Column(db.JSON, nullable=False)  # Store progress and answers
     last_activity = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_assessment_session_user', 'user_id'),
+    )
     
     def update_activity(self):
         self.last_activity = datetime.utcnow()
@@ -137,4 +236,48 @@ class Profile(db.Model):
     age = db.Column(db.Integer, nullable=True)
     gender = db.Column(db.String(50), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
\ No newline at end of file
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # get_profile_by_email and the email dashboard look profiles up by email
+        db.Index('ix_profile_email', 'email'),
+    )
+
+class CacheVersion(db.Model):
+    # Bumped in the same transaction as a write, so every worker can tell its cached copies are stale
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+class IdempotencyKey(db.Model):
+    # Claimed in the same transaction as the row an ingestion request creates; the response is stored after commit
+    id = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.String(50), nullable=False)  # Route the key was used on
+    key = db.Column(db.String(255), nullable=False)
+    request_hash = db.Column(db.String(64), nullable=False)  # sha256 of the request body
+    status_code = db.Column(db.Integer, nullable=True)  # NULL until the response is stored
+    response_body = db.Column(db.JSON, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ux_idempotency_key_scope_key', 'scope', 'key', unique=True),
+        db.Index('ix_idempotency_key_created_at', 'created_at'),
+    )
+
+class PurgeJob(db.Model):
+    # Background deletion of everything stored for a user; progress is saved with every batch so it can resume
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = db.Column(db.String, nullable=False)
+    user_email = db.Column(db.String(255), nullable=True)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, running, completed, failed
+    current_step = db.Column(db.String(50), nullable=True)
+    deleted_counts = db.Column(db.JSON, nullable=False, default=dict)  # {table: rows deleted}
+    error = db.Column(db.Text, nullable=True)
+    lease_until = db.Column(db.DateTime, nullable=True)  # A worker owns a running job until then
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    completed_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_purge_job_user_created', 'user_id', 'created_at'),
+        db.Index('ix_purge_job_status', 'status'),
+    )
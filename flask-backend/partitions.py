@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+"""
+Time-partitioned storage and archival for the append-only log tables
+
+On PostgreSQL, user_interaction and chat_log are converted once into tables
+declaratively partitioned by month on timestamp. Partitions are created ahead
+of time, and partitions older than the retention window are exported to
+gzip-compressed NDJSON files and dropped. On SQLite the same archive files
+are produced month by month and the rows are deleted in batches.
+
+Each partitioned table also has a DEFAULT partition, so an insert past the
+last monthly partition (the app wasn't restarted and `ensure` didn't run for
+MONTHS_AHEAD months) still succeeds. `ensure` moves such rows into the
+monthly partition it creates for them. The app runs `ensure` at startup;
+schedule `python partitions.py ensure` (e.g. daily from cron) as well.
+
+Usage:
+    python partitions.py convert             # one-time, PostgreSQL only
+    python partitions.py ensure
+    python partitions.py archive [--retention-months 12]
+    python partitions.py restore archives/chat_log_p202401.ndjson.gz
+"""
+
+import argparse
+import gzip
+import json
+import os
+import re
+import sys
+from datetime import datetime
+from sqlalchemy import DateTime, text
+from database import db
+from models import ChatLog, UserInteraction
+
+PARTITIONED_MODELS = {
+    'user_interaction': UserInteraction,
+    'chat_log': ChatLog,
+}
+
+ARCHIVE_DIR = os.getenv('ARCHIVE_DIR', 'archives')
+RETENTION_MONTHS = int(os.getenv('PARTITION_RETENTION_MONTHS', 12))
+MONTHS_AHEAD = int(os.getenv('PARTITION_MONTHS_AHEAD', 3))
+BATCH_SIZE = 5000
+
+_BOUND_PATTERN = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+
+def month_start(value):
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(value, months):
+    month_index = value.year * 12 + value.month - 1 + months
+    return datetime(month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_name(table_name, lower):
+    return f"{table_name}_p{lower:%Y%m}"
+
+
+def default_partition_name(table_name):
+    return f"{table_name}_default"
+
+
+def is_postgres():
+    return db.engine.dialect.name == 'postgresql'
+
+
+def is_partitioned(connection, table_name):
+    """Return True if table_name is a declaratively partitioned PostgreSQL table"""
+    return connection.execute(text("""
+        SELECT 1 FROM pg_partitioned_table p
+        JOIN pg_class c ON c.oid = p.partrelid
+        WHERE c.relname = :table_name
+    """), {'table_name': table_name}).first() is not None
+
+
+def _parse_bound(value):
+    value = value.strip()
+    if value.upper() == 'MINVALUE':
+        return None
+    if value.upper() == 'MAXVALUE':
+        return datetime.max
+    return datetime.fromisoformat(value.strip("'"))
+
+
+def list_partitions(connection, table_name):
+    """
+    List the partitions of a partitioned table
+
+    Returns:
+        list: (partition_name, lower, upper) tuples ordered by lower bound;
+              lower is None for a MINVALUE bound
+    """
+    rows = connection.execute(text("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = CAST(:table_name AS regclass)
+    """), {'table_name': table_name}).fetchall()
+
+    partitions = []
+    for name, bound in rows:
+        match = _BOUND_PATTERN.search(bound or '')
+        if match:
+            partitions.append((name, _parse_bound(match.group(1)), _parse_bound(match.group(2))))
+    return sorted(partitions, key=lambda p: p[1] or datetime.min)
+
+
+def _has_constraint(connection, table_name, name):
+    return connection.execute(text("""
+        SELECT 1 FROM pg_constraint
+        WHERE conrelid = CAST(:table_name AS regclass) AND conname = :name
+    """), {'table_name': table_name, 'name': name}).first() is not None
+
+
+def convert_to_partitioned(table_name):
+    """
+    Swap a plain PostgreSQL table for a monthly range-partitioned one
+
+    The existing table is kept as a single partition covering everything
+    before the start of next month, so no rows are copied. Everything that
+    has to read the whole table happens first, while writes continue: a
+    CHECK constraint matching the partition bound is validated and the
+    (id, timestamp) key is built concurrently. The swap itself then only
+    takes short locks, because ATTACH PARTITION trusts the validated
+    constraint and adopts the prebuilt index instead of scanning.
+
+    The legacy partition is archived as a whole once its upper bound falls
+    outside the retention window; until then `archive` leaves it in place.
+    To archive it sooner, export and delete its old months by hand.
+    """
+    from migration_runner import MigrationContext
+
+    boundary = add_months(month_start(datetime.utcnow()), 1)
+    legacy = f"{table_name}_legacy"
+    bound_check = f"{table_name}_partition_bound"
+    key_index = f"{table_name}_id_timestamp_key"
+
+    with db.engine.begin() as connection:
+        if is_partitioned(connection, table_name):
+            print(f"✅ {table_name} is already partitioned")
+            return
+
+        print(f"Converting {table_name} to a partitioned table...")
+        connection.execute(text("SET LOCAL lock_timeout = '5s'"))
+        connection.execute(text(f"UPDATE {table_name} SET timestamp = now() AT TIME ZONE 'utc' WHERE timestamp IS NULL"))
+        if not _has_constraint(connection, table_name, bound_check):
+            connection.execute(text(f"""
+                ALTER TABLE {table_name} ADD CONSTRAINT {bound_check}
+                CHECK (timestamp IS NOT NULL AND timestamp < '{boundary.isoformat()}') NOT VALID
+            """))
+
+    # VALIDATE only takes a lock that lets reads and writes continue during the scan
+    with db.engine.begin() as connection:
+        connection.execute(text("SET LOCAL lock_timeout = '5s'"))
+        connection.execute(text(f"ALTER TABLE {table_name} VALIDATE CONSTRAINT {bound_check}"))
+    MigrationContext(db.engine).create_index(key_index, table_name, ['id', 'timestamp'], unique=True)
+
+    with db.engine.begin() as connection:
+        connection.execute(text("SET LOCAL lock_timeout = '5s'"))
+        connection.execute(text(f"ALTER TABLE {table_name} RENAME TO {legacy}"))
+        # The validated CHECK proves there are no NULLs, so this doesn't scan either
+        connection.execute(text(f"ALTER TABLE {legacy} ALTER COLUMN timestamp SET NOT NULL"))
+        # A partition's primary key has to match the parent's; swap in the prebuilt index
+        connection.execute(text(f"ALTER TABLE {legacy} DROP CONSTRAINT {table_name}_pkey"))
+        connection.execute(text(f"ALTER TABLE {legacy} ADD CONSTRAINT {legacy}_pkey PRIMARY KEY USING INDEX {key_index}"))
+        connection.execute(text(f"""
+            CREATE TABLE {table_name} (LIKE {legacy} INCLUDING DEFAULTS)
+            PARTITION BY RANGE (timestamp)
+        """))
+        # The partition key has to be part of the primary key
+        connection.execute(text(f"ALTER TABLE {table_name} ADD PRIMARY KEY (id, timestamp)"))
+        connection.execute(text(f"ALTER SEQUENCE {table_name}_id_seq OWNED BY {table_name}.id"))
+        for index in PARTITIONED_MODELS[table_name].__table__.indexes:
+            columns = ', '.join(column.name for column in index.columns)
+            connection.execute(text(f"CREATE INDEX IF NOT EXISTS {index.name}_parent ON {table_name} ({columns})"))
+        connection.execute(text(f"""
+            ALTER TABLE {table_name} ATTACH PARTITION {legacy}
+            FOR VALUES FROM (MINVALUE) TO ('{boundary.isoformat()}')
+        """))
+        # The partition bound enforces the same thing from here on
+        connection.execute(text(f"ALTER TABLE {legacy} DROP CONSTRAINT {bound_check}"))
+
+    print(f"✅ {table_name} converted; existing rows live in {legacy}")
+    ensure_partitions(table_name)
+
+
+def _create_month_partition(connection, table_name, name, lower, upper):
+    """
+    Create one monthly partition, moving any of its rows out of the DEFAULT partition
+
+    PostgreSQL refuses a new partition while the default one holds rows in
+    its range, so those rows are moved into a standalone table first, which
+    is then attached.
+    """
+    default = default_partition_name(table_name)
+    bounds = {'lower': lower, 'upper': upper}
+    stranded = connection.execute(text(f"""
+        SELECT 1 FROM {default} WHERE timestamp >= :lower AND timestamp < :upper LIMIT 1
+    """), bounds).first()
+    if stranded is None:
+        connection.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table_name}
+            FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')
+        """))
+        return
+
+    connection.execute(text(f"CREATE TABLE {name} (LIKE {table_name} INCLUDING DEFAULTS)"))
+    moved = connection.execute(text(f"""
+        WITH moved AS (
+            DELETE FROM {default} WHERE timestamp >= :lower AND timestamp < :upper RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+    """), bounds).rowcount
+    connection.execute(text(f"""
+        ALTER TABLE {table_name} ATTACH PARTITION {name}
+        FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')
+    """))
+    print(f"Moved {moved} rows from {default} into {name}")
+
+
+def ensure_partitions(table_name, months_ahead=MONTHS_AHEAD):
+    """
+    Create the DEFAULT partition and monthly partitions from the current month up to months_ahead
+
+    Returns:
+        list: Names of the partitions that were created
+    """
+    created = []
+    with db.engine.begin() as connection:
+        if not is_partitioned(connection, table_name):
+            return created
+
+        connection.execute(text("SET LOCAL lock_timeout = '5s'"))
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {default_partition_name(table_name)} PARTITION OF {table_name} DEFAULT"
+        ))
+        existing = list_partitions(connection, table_name)
+        lower = month_start(datetime.utcnow())
+        for _ in range(months_ahead + 1):
+            upper = add_months(lower, 1)
+            overlaps = any((p_lower or datetime.min) < upper and lower < p_upper for _, p_lower, p_upper in existing)
+            if not overlaps:
+                name = partition_name(table_name, lower)
+                _create_month_partition(connection, table_name, name, lower, upper)
+                created.append(name)
+            lower = upper
+
+    for name in created:
+        print(f"✅ Created partition {name}")
+    return created
+
+
+def ensure_all_partitions():
+    """Create upcoming partitions for every partitioned log table; no-op off PostgreSQL"""
+    if not is_postgres():
+        return []
+    created = []
+    for table_name in PARTITIONED_MODELS:
+        created.extend(ensure_partitions(table_name))
+    return created
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _export_range(table, lower, upper, path):
+    """Stream rows with lower <= timestamp < upper into a gzip NDJSON file"""
+    query = table.select().order_by(table.c.id)
+    if lower is not None:
+        query = query.where(table.c.timestamp >= lower)
+    query = query.where(table.c.timestamp < upper)
+
+    count = 0
+    tmp_path = f"{path}.tmp"
+    with db.engine.connect() as connection, gzip.open(tmp_path, 'wt', encoding='utf-8') as archive:
+        result = connection.execution_options(stream_results=True, yield_per=BATCH_SIZE).execute(query)
+        for row in result.mappings():
+            archive.write(json.dumps(dict(row), default=_json_default) + '\n')
+            count += 1
+    os.replace(tmp_path, path)
+    return count
+
+
+def _write_manifest(path, table_name, partition, lower, upper, row_count):
+    with open(f"{path}.json", 'w') as manifest:
+        json.dump({
+            'table': table_name,
+            'partition': partition,
+            'lower': lower.isoformat() if lower else None,
+            'upper': upper.isoformat(),
+            'row_count': row_count,
+            'archived_at': datetime.utcnow().isoformat()
+        }, manifest, indent=2)
+
+
+def archive_old_partitions(table_name, retention_months=RETENTION_MONTHS, archive_dir=ARCHIVE_DIR):
+    """
+    Move data older than the retention window into compressed archive files
+
+    Returns:
+        list: Paths of the archive files written
+    """
+    table = PARTITIONED_MODELS[table_name].__table__
+    cutoff = add_months(month_start(datetime.utcnow()), -retention_months)
+    os.makedirs(archive_dir, exist_ok=True)
+    written = []
+
+    if is_postgres():
+        with db.engine.connect() as connection:
+            if not is_partitioned(connection, table_name):
+                print(f"⚠️ {table_name} is not partitioned; run 'python partitions.py convert' first")
+                return written
+            existing = list_partitions(connection, table_name)
+        partitions = [p for p in existing if p[2] <= cutoff]
+        for name, lower, upper in existing:
+            if (lower or datetime.min) < cutoff < upper:
+                print(f"⚠️ {name} spans the retention cutoff and is kept until {upper:%Y-%m-%d} leaves the window")
+
+        for name, lower, upper in partitions:
+            path = os.path.join(archive_dir, f"{name}.ndjson.gz")
+            row_count = _export_range(table, lower, upper, path)
+            _write_manifest(path, table_name, name, lower, upper, row_count)
+            with db.engine.begin() as connection:
+                connection.execute(text(f"ALTER TABLE {table_name} DETACH PARTITION {name}"))
+                connection.execute(text(f"DROP TABLE {name}"))
+            print(f"✅ Archived {row_count} rows from {name} to {path}")
+            written.append(path)
+        return written
+
+    # Without native partitions, archive calendar months and delete them in batches
+    with db.engine.connect() as connection:
+        oldest = connection.execute(db.select(db.func.min(table.c.timestamp))).scalar()
+    if oldest is None:
+        return written
+
+    lower = month_start(oldest)
+    while lower < cutoff:
+        upper = add_months(lower, 1)
+        name = partition_name(table_name, lower)
+        path = os.path.join(archive_dir, f"{name}.ndjson.gz")
+        row_count = _export_range(table, lower, upper, path)
+        if row_count:
+            _write_manifest(path, table_name, name, lower, upper, row_count)
+            _delete_range_in_batches(table, lower, upper)
+            print(f"✅ Archived {row_count} rows from {table_name} for {lower:%Y-%m} to {path}")
+            written.append(path)
+        else:
+            os.remove(path)
+        lower = upper
+    return written
+
+
+def _delete_range_in_batches(table, lower, upper):
+    while True:
+        with db.engine.begin() as connection:
+            ids = db.select(table.c.id).where(
+                table.c.timestamp >= lower, table.c.timestamp < upper
+            ).limit(BATCH_SIZE).scalar_subquery()
+            deleted = connection.execute(table.delete().where(table.c.id.in_(ids))).rowcount
+        if not deleted:
+            break
+
+
+def restore_archive(path):
+    """
+    Load an archive file back into its table, recreating the partition if needed
+
+    Returns:
+        int: Number of rows restored
+    """
+    with open(f"{path}.json") as manifest_file:
+        manifest = json.load(manifest_file)
+
+    table_name = manifest['table']
+    table = PARTITIONED_MODELS[table_name].__table__
+    lower = datetime.fromisoformat(manifest['lower']) if manifest['lower'] else None
+    upper = datetime.fromisoformat(manifest['upper'])
+    datetime_columns = {column.name for column in table.columns if isinstance(column.type, DateTime)}
+
+    if is_postgres():
+        with db.engine.begin() as connection:
+            covered = any(
+                (p_lower or datetime.min) <= (lower or datetime.min) and upper <= p_upper
+                for _, p_lower, p_upper in list_partitions(connection, table_name)
+            )
+            if not covered:
+                bound_from = f"'{lower.isoformat()}'" if lower else 'MINVALUE'
+                connection.execute(text(f"""
+                    CREATE TABLE {manifest['partition']} PARTITION OF {table_name}
+                    FOR VALUES FROM ({bound_from}) TO ('{upper.isoformat()}')
+                """))
+
+    restored = 0
+    batch = []
+    with gzip.open(path, 'rt', encoding='utf-8') as archive:
+        for line in archive:
+            row = json.loads(line)
+            for column in datetime_columns:
+                if row.get(column):
+                    row[column] = datetime.fromisoformat(row[column])
+            batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                restored += _insert_batch(table, batch)
+                batch = []
+    if batch:
+        restored += _insert_batch(table, batch)
+
+    print(f"✅ Restored {restored} rows into {table_name} from {path}")
+    return restored
+
+
+def _insert_batch(table, rows):
+    with db.engine.begin() as connection:
+        connection.execute(table.insert(), rows)
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage partitions and archives for log tables')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('convert', help='Convert log tables to monthly partitions (PostgreSQL)')
+    subparsers.add_parser('ensure', help='Create upcoming monthly partitions')
+    archive_parser = subparsers.add_parser('archive', help='Archive and drop data past the retention window')
+    archive_parser.add_argument('--retention-months', type=int, default=RETENTION_MONTHS)
+    archive_parser.add_argument('--archive-dir', default=ARCHIVE_DIR)
+    restore_parser = subparsers.add_parser('restore', help='Restore an archive file')
+    restore_parser.add_argument('path')
+    args = parser.parse_args()
+
+    from app import app
+
+    try:
+        with app.app_context():
+            if args.command == 'convert':
+                if not is_postgres():
+                    print("❌ Partitioning requires PostgreSQL")
+                    sys.exit(1)
+                for table_name in PARTITIONED_MODELS:
+                    convert_to_partitioned(table_name)
+            elif args.command == 'ensure':
+                ensure_all_partitions()
+            elif args.command == 'archive':
+                for table_name in PARTITIONED_MODELS:
+                    archive_old_partitions(table_name, args.retention_months, args.archive_dir)
+            elif args.command == 'restore':
+                restore_archive(args.path)
+    except Exception as e:
+        print(f"❌ Partition maintenance failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Read-through cache of Profile rows shared by the profile and dashboard routes
+
+Entries are plain snapshots of the row's columns, so they outlive the
+request's session and can be handed to the serializers like a model.
+Lookups that find nothing are cached too, which keeps repeated dashboard
+requests for unknown emails off the database.
+
+Writes call mark_changed() before commit, which bumps the 'profile' row of
+cache_version in the same transaction, and invalidate() after commit, which
+empties the cache in this worker. Other workers compare their copy of
+the version with the database at most once per version_check_seconds and
+clear themselves when it moved, so a stale profile is served for at most
+that long anywhere.
+"""
+import os
+import threading
+import time
+from types import SimpleNamespace
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from cache import TTLCache
+from database import db
+from models import CacheVersion, Profile
+
+VERSION_NAME = 'profile'
+_MISSING = object()
+
+
+def snapshot(profile):
+    """Detached copy of a Profile's column values, or None"""
+    if profile is None:
+        return None
+    return SimpleNamespace(**{column.key: getattr(profile, column.key) for column in Profile.__table__.columns})
+
+
+class ProfileCache:
+    """
+    Profile lookups by id and by email with hit-rate counters
+
+    Args:
+        ttl_seconds: Upper bound on how long an entry is served
+        max_entries: Least recently used entries beyond this are evicted
+        version_check_seconds: How often the cache_version stamp is read; 0 checks on every lookup
+    """
+
+    def __init__(self, ttl_seconds=300, max_entries=10000, version_check_seconds=1.0):
+        self.version_check_seconds = version_check_seconds
+        self._entries = TTLCache(ttl_seconds=ttl_seconds, max_entries=max_entries)
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = 0.0
+        # Bumped on every invalidation; a load that started before one is not stored
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            ttl_seconds=int(os.getenv('PROFILE_CACHE_TTL', 300)),
+            max_entries=int(os.getenv('PROFILE_CACHE_MAX_ENTRIES', 10000)),
+            version_check_seconds=float(os.getenv('PROFILE_CACHE_VERSION_CHECK_SECONDS', 1.0)),
+        )
+
+    def get(self, user_id):
+        return self._get(f'id:{user_id}', lambda: Profile.query.filter_by(id=user_id).first())
+
+    def get_by_email(self, email):
+        return self._get(f'email:{email}', lambda: Profile.query.filter_by(email=email).first())
+
+    def _get(self, key, load):
+        self._check_version()
+        generation = self._generation
+        value = self._entries.get(key, _MISSING)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = snapshot(load())
+        with self._lock:
+            if generation == self._generation:
+                self._entries.set(key, value)
+        return value
+
+    def _check_version(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.version_check_seconds:
+            return
+        version = db.session.execute(
+            select(CacheVersion.version).where(CacheVersion.name == VERSION_NAME)
+        ).scalar() or 0
+        with self._lock:
+            self._checked_at = now
+            if version != self._version:
+                if self._version is not None:
+                    self._entries.invalidate()
+                    self._generation += 1
+                self._version = version
+
+    @staticmethod
+    def mark_changed():
+        """Bump the shared version inside the caller's transaction; call before commit"""
+        bumped = db.session.execute(
+            update(CacheVersion).where(CacheVersion.name == VERSION_NAME).values(version=CacheVersion.version + 1)
+        ).rowcount
+        if not bumped:
+            try:
+                with db.session.begin_nested():
+                    db.session.add(CacheVersion(name=VERSION_NAME, version=1))
+            except IntegrityError:
+                # Another worker created the row first
+                db.session.execute(
+                    update(CacheVersion).where(CacheVersion.name == VERSION_NAME)
+                    .values(version=CacheVersion.version + 1)
+                )
+
+    def invalidate(self):
+        """
+        Drop this worker's entries after a committed write
+
+        The whole cache goes rather than the written keys: the bumped version
+        makes the next lookup clear it anyway, and profile writes are rare.
+        """
+        with self._lock:
+            self._entries.invalidate()
+            self._generation += 1
+            self._checked_at = 0.0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+            'entries': len(self._entries),
+            'max_entries': self._entries.max_entries,
+            'version': self._version,
+        }
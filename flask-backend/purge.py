@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Chunked purge of everything stored for a user
+
+delete_profile records a PurgeJob and returns; a background thread then
+deletes the user's rows table by table in batches of PURGE_BATCH_SIZE, each
+batch in its own short transaction together with the job's progress, so no
+table is locked for long and an interrupted job picks up where it stopped.
+The profile row goes last, which keeps the job resumable by user id until
+everything else is gone. Rows the user wrote after their table's step had
+finished are swept up in that last transaction, with the profile.
+
+Forum posts and feedback are public content with their own moderation
+aggregates and are left in place.
+
+A job is owned by one worker at a time through lease_until. A job whose
+lease ran out (its worker died) is picked up again the next time its status
+is polled; failed jobs are retried by deleting the profile again. Both are
+also finished by `python purge.py resume`.
+
+Usage:
+    python purge.py run <user_id>      # purge in the foreground
+    python purge.py resume             # finish interrupted jobs
+    python purge.py status <user_id>
+"""
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import or_, select
+from database import db
+from models import (
+    AssessmentSession, BreathingExerciseLog, ChatLog, ComprehensiveAssessment, FacialAnalysisFrameChunk,
+    FacialAnalysisSession, FacialAnalysisUpload, MoodGrooveResult, Profile, PurgeJob, TestSubmission,
+    UserInteraction
+)
+from profile_cache import ProfileCache
+
+BATCH_SIZE = int(os.getenv('PURGE_BATCH_SIZE', 1000))
+BATCH_PAUSE_SECONDS = float(os.getenv('PURGE_BATCH_PAUSE_SECONDS', 0.05))
+LEASE_SECONDS = 60
+
+# (step, model, condition(user_id, user_email)) in deletion order; chunks go before their uploads
+PURGE_STEPS = [
+    ('test_submission', TestSubmission, lambda uid, email: TestSubmission.user_id == uid),
+    ('mood_groove_result', MoodGrooveResult, lambda uid, email: or_(
+        MoodGrooveResult.user_id == uid, *([MoodGrooveResult.user_email == email] if email else [])
+    )),
+    ('chat_log', ChatLog, lambda uid, email: ChatLog.user_id == uid),
+    ('breathing_exercise_log', BreathingExerciseLog, lambda uid, email: BreathingExerciseLog.user_id == uid),
+    ('user_interaction', UserInteraction, lambda uid, email: UserInteraction.user_id == uid),
+    ('facial_analysis_frame_chunk', FacialAnalysisFrameChunk, lambda uid, email: FacialAnalysisFrameChunk.upload_id.in_(
+        select(FacialAnalysisUpload.id).where(FacialAnalysisUpload.user_email == email)
+    )),
+    ('facial_analysis_upload', FacialAnalysisUpload, lambda uid, email: FacialAnalysisUpload.user_email == email),
+    ('facial_analysis_session', FacialAnalysisSession, lambda uid, email: FacialAnalysisSession.user_email == email),
+    ('comprehensive_assessment', ComprehensiveAssessment, lambda uid, email: ComprehensiveAssessment.user_id == uid),
+    ('assessment_session', AssessmentSession, lambda uid, email: AssessmentSession.user_id == uid),
+]
+EMAIL_ONLY_STEPS = {'facial_analysis_frame_chunk', 'facial_analysis_upload', 'facial_analysis_session'}
+PROFILE_STEP = 'profile'
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='purge')
+_submitted = set()
+_submitted_lock = threading.Lock()
+
+
+def create_purge_job(user_id, user_email):
+    """
+    Record a purge for user_id, or return the unfinished one
+
+    A failed job is set back to pending so it resumes from the step it stopped at.
+
+    Returns:
+        PurgeJob: Committed job
+    """
+    job = PurgeJob.query.filter(
+        PurgeJob.user_id == user_id, PurgeJob.status.in_(('pending', 'running', 'failed'))
+    ).first()
+    if job is None:
+        job = PurgeJob(user_id=user_id, user_email=user_email, deleted_counts={})
+        db.session.add(job)
+    elif job.status == 'failed':
+        job.status = 'pending'
+        job.error = None
+    db.session.commit()
+    return job
+
+
+def _claim(job_id):
+    """Take the job's lease; False if another worker holds it or the job is finished"""
+    now = datetime.utcnow()
+    claimed = PurgeJob.query.filter(
+        PurgeJob.id == job_id,
+        or_(PurgeJob.status == 'pending',
+            (PurgeJob.status == 'running') & (or_(PurgeJob.lease_until.is_(None), PurgeJob.lease_until < now)))
+    ).update({'status': 'running', 'lease_until': now + timedelta(seconds=LEASE_SECONDS)},
+             synchronize_session=False)
+    db.session.commit()
+    return claimed == 1
+
+
+def _delete_batch(connection, model, condition, batch_size):
+    table = model.__table__
+    ids = select(table.c.id).where(condition).limit(batch_size).scalar_subquery()
+    return connection.execute(table.delete().where(table.c.id.in_(ids))).rowcount
+
+
+def _sweep(user_id, user_email, counts):
+    """Delete rows written after their step finished; runs in the session's transaction, before the profile"""
+    for name, model, condition in PURGE_STEPS:
+        if name in EMAIL_ONLY_STEPS and not user_email:
+            continue
+        table = model.__table__
+        deleted = db.session.execute(table.delete().where(condition(user_id, user_email))).rowcount
+        if deleted:
+            counts[name] = counts.get(name, 0) + deleted
+            print(f"Purge: swept {deleted} late {name} rows for {user_id}")
+
+
+def _save_progress(connection, job_id, step, counts):
+    """Record progress and renew the lease, in the same transaction as the batch"""
+    connection.execute(PurgeJob.__table__.update().where(PurgeJob.__table__.c.id == job_id).values(
+        current_step=step, deleted_counts=counts, updated_at=datetime.utcnow(),
+        lease_until=datetime.utcnow() + timedelta(seconds=LEASE_SECONDS)
+    ))
+
+
+def run_purge(job_id, batch_size=BATCH_SIZE, pause_seconds=BATCH_PAUSE_SECONDS):
+    """
+    Run a purge job to completion, resuming from its saved step
+
+    Returns:
+        PurgeJob: The job, or None if another worker owns it
+    """
+    if not _claim(job_id):
+        return None
+    job = db.session.get(PurgeJob, job_id)
+    user_id, user_email = job.user_id, job.user_email
+    counts = dict(job.deleted_counts or {})
+    step_names = [name for name, _, _ in PURGE_STEPS]
+    start = step_names.index(job.current_step) if job.current_step in step_names else 0
+    if job.current_step == PROFILE_STEP:
+        start = len(PURGE_STEPS)
+    # Don't hold the session's transaction open while the batches run on other connections
+    db.session.commit()
+
+    try:
+        for name, model, condition in PURGE_STEPS[start:]:
+            if name in EMAIL_ONLY_STEPS and not user_email:
+                continue
+            where = condition(user_id, user_email)
+            while True:
+                with db.engine.begin() as connection:
+                    deleted = _delete_batch(connection, model, where, batch_size)
+                    counts[name] = counts.get(name, 0) + deleted
+                    _save_progress(connection, job_id, name, counts)
+                if deleted < batch_size:
+                    break
+                time.sleep(pause_seconds)
+            print(f"Purge {job_id}: deleted {counts.get(name, 0)} {name} rows for {user_id}")
+
+        # Last step: late rows and the profile, with the cache version bump in the same transaction
+        _sweep(user_id, user_email, counts)
+        deleted = Profile.query.filter_by(id=user_id).delete(synchronize_session=False)
+        ProfileCache.mark_changed()
+        counts[PROFILE_STEP] = counts.get(PROFILE_STEP, 0) + deleted
+        db.session.refresh(job)
+        job.current_step = PROFILE_STEP
+        job.deleted_counts = counts
+        job.status = 'completed'
+        job.completed_at = datetime.utcnow()
+        job.lease_until = None
+        db.session.commit()
+        print(f"Purge {job_id} completed for {user_id}: {counts}")
+        return job
+    except Exception as e:
+        db.session.rollback()
+        print(f"Purge {job_id} failed for {user_id}: {e}")
+        PurgeJob.query.filter_by(id=job_id).update(
+            {'status': 'failed', 'error': str(e), 'lease_until': None}, synchronize_session=False
+        )
+        db.session.commit()
+        return db.session.get(PurgeJob, job_id)
+
+
+def _run_in_background(app, job_id):
+    try:
+        with app.app_context():
+            run_purge(job_id)
+    finally:
+        with _submitted_lock:
+            _submitted.discard(job_id)
+
+
+def submit_purge(app, job_id):
+    """Queue a job on this process's purge thread; jobs run one at a time"""
+    with _submitted_lock:
+        if job_id in _submitted:
+            return
+        _submitted.add(job_id)
+    _executor.submit(_run_in_background, app, job_id)
+
+
+def resume_if_abandoned(app, job):
+    """
+    Queue a pending or running job nobody is working on, e.g. after its worker died
+
+    Returns:
+        bool: True if the job was queued here
+    """
+    if job.status not in ('pending', 'running'):
+        return False
+    if job.lease_until is not None and job.lease_until >= datetime.utcnow():
+        return False
+    # Another worker may do the same; run_purge's lease lets only one of them proceed
+    submit_purge(app, job.id)
+    return True
+
+
+def job_status(job):
+    return {
+        'job_id': job.id,
+        'user_id': job.user_id,
+        'status': job.status,
+        'current_step': job.current_step,
+        'deleted_counts': job.deleted_counts or {},
+        'error': job.error,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'completed_at': job.completed_at.isoformat() if job.completed_at else None,
+    }
+
+
+def main():
+    from app import app
+
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    with app.app_context():
+        if command == 'run' and len(sys.argv) > 2:
+            user_id = sys.argv[2]
+            profile = Profile.query.filter_by(id=user_id).first()
+            job = create_purge_job(user_id, profile.email if profile else None)
+            print(f"🧹 Purging data for {user_id} (job {job.id})...")
+            job = run_purge(job.id)
+            print(job_status(job) if job else "❌ Job is owned by another worker")
+        elif command == 'resume':
+            for job in PurgeJob.query.filter(PurgeJob.status.in_(('pending', 'running'))).all():
+                result = run_purge(job.id)
+                print(f"{'✅' if result else '⏭️ '} {job.id} {result.status if result else 'owned by another worker'}")
+        elif command == 'status' and len(sys.argv) > 2:
+            for job in PurgeJob.query.filter_by(user_id=sys.argv[2]).order_by(PurgeJob.created_at).all():
+                print(job_status(job))
+        else:
+            print("Usage: python purge.py run <user_id> | resume | status <user_id>")
+            sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Per-request SQL statement counting and N+1 detection
+
+Engine event listeners record every statement executed while a collector is
+active. Each request gets its own collector; its statement count and total
+database time are returned in the X-DB-Queries and Server-Timing headers.
+Statements that repeat with the same shape within one request are logged as
+probable N+1 patterns.
+
+Tests can wrap calls in query_budget() to assert a route stays within a
+statement budget.
+"""
+import os
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+ENABLED = os.getenv('QUERY_STATS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+N_PLUS_ONE_THRESHOLD = int(os.getenv('N_PLUS_ONE_THRESHOLD', 5))
+
+_collectors = ContextVar('query_stats_collectors', default=())
+_listeners_installed = False
+
+_IN_LIST = re.compile(r'IN\s*\((?:\s*(?:\?|%\(\w+\)s|:\w+|__\[POSTCOMPILE_\w+\])\s*,?)+\)', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint(statement):
+    """Statement shape with IN-lists collapsed, so batched and single lookups compare equal"""
+    return _WHITESPACE.sub(' ', _IN_LIST.sub('IN (...)', statement)).strip()
+
+
+class QueryStats:
+    """Statements seen while one collector was active"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.statements = []
+        self.shapes = Counter()
+
+    def record(self, statement, duration_ms):
+        self.count += 1
+        self.total_ms += duration_ms
+        self.statements.append(statement)
+        self.shapes[fingerprint(statement)] += 1
+
+    def repeated(self, threshold=N_PLUS_ONE_THRESHOLD):
+        """Statement shapes executed at least threshold times, most frequent first"""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised by query_budget when a block runs more statements than allowed"""
+
+
+@contextmanager
+def collect_queries():
+    """Collect statements run inside the block; nested collectors all see them"""
+    stats = QueryStats()
+    token = _collectors.set(_collectors.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _collectors.reset(token)
+
+
+@contextmanager
+def query_budget(max_queries):
+    """
+    Fail if the block runs more than max_queries statements
+
+    Example:
+        with query_budget(8):
+            client.get(f'/api/dashboard/unified/{user_id}/{email}')
+    """
+    install_listeners()
+    with collect_queries() as stats:
+        yield stats
+    if stats.count > max_queries:
+        listing = '\n'.join(f"  {n}x {shape}" for shape, n in stats.shapes.most_common())
+        raise QueryBudgetExceeded(f"Ran {stats.count} SQL statements, budget is {max_queries}:\n{listing}")
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _collectors.get():
+        conn.info.setdefault('query_stats_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    collectors = _collectors.get()
+    if not collectors:
+        return
+    started = conn.info.get('query_stats_started')
+    duration_ms = (time.perf_counter() - started.pop()) * 1000 if started else 0.0
+    for stats in collectors:
+        stats.record(statement, duration_ms)
+
+
+def install_listeners():
+    """Attach the statement listeners to every engine (primary and replicas) once"""
+    global _listeners_installed
+    if not _listeners_installed:
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        _listeners_installed = True
+
+
+def init_query_stats(app):
+    """Count statements per request and report them in response headers"""
+    if not ENABLED:
+        return
+    install_listeners()
+
+    @app.before_request
+    def start_query_stats():
+        g.query_stats = QueryStats()
+        g.query_stats_token = _collectors.set(_collectors.get() + (g.query_stats,))
+
+    @app.after_request
+    def report_query_stats(response):
+        stats = g.get('query_stats')
+        if stats is None:
+            return response
+        response.headers['X-DB-Queries'] = str(stats.count)
+        response.headers.add('Server-Timing', f'db;dur={stats.total_ms:.1f};desc="{stats.count} queries"')
+        for shape, n in stats.repeated():
+            rule = request.url_rule.rule if request.url_rule else request.path
+            print(f"Probable N+1 in {request.method} {rule}: {n}x {shape[:200]}")
+        return response
+
+    @app.teardown_request
+    def stop_query_stats(exc):
+        token = g.pop('query_stats_token', None)
+        if token is not None:
+            _collectors.reset(token)
+
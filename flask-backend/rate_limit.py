@@ -0,0 +1,227 @@
+"""
+Per-user token-bucket admission control for ingestion routes
+
+Buckets live in a small SQLite file so every gunicorn worker on the host
+draws from the same budget. Requests over budget are rejected with 429 and
+a Retry-After header before they touch the main database pool. If the file
+can't be used, requests are admitted rather than failed.
+
+Buckets are keyed by the user in the request body, or by a route-specific
+identity (e.g. the owner of the upload in the URL). Requests without one fall
+back to the client address: remote_addr, or with RATE_LIMIT_TRUSTED_PROXIES
+proxies in front, the address the outermost of them saw. The leftmost
+X-Forwarded-For entry is never used, because the client controls it.
+"""
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from functools import wraps
+from flask import jsonify, request
+
+# Reverse proxies in front of the app that append to X-Forwarded-For
+TRUSTED_PROXY_HOPS = int(os.getenv('RATE_LIMIT_TRUSTED_PROXIES', 0))
+
+# route name -> (bucket capacity, seconds to refill a full bucket)
+DEFAULT_LIMITS = {
+    'facial-analysis': (10, 60),
+    'facial-analysis-frames': (120, 60),
+    'mood-groove': (30, 60),
+    'interactions': (120, 60),
+}
+
+
+def parse_limits(spec, defaults=DEFAULT_LIMITS):
+    """
+    Parse a limits spec such as "mood-groove=30/60,interactions=120/60"
+
+    Args:
+        spec: Comma-separated name=capacity/period entries, or None
+        defaults: Limits used for routes not named in spec
+
+    Returns:
+        dict: {name: (capacity, period_seconds)}
+    """
+    limits = dict(defaults)
+    for entry in (spec or '').split(','):
+        if not entry.strip():
+            continue
+        name, _, value = entry.partition('=')
+        capacity, _, period = value.partition('/')
+        limits[name.strip()] = (int(capacity), float(period or 60))
+    return limits
+
+
+class TokenBucketStore:
+    """
+    Token buckets persisted in a SQLite file shared by processes on one host
+
+    A bucket left alone for a full refill period is full again, the same as
+    a missing row, so rows idle for longer than idle_seconds are deleted
+    every prune_every takes.
+
+    Args:
+        path: SQLite file path
+        idle_seconds: At least the longest refill period of any route
+        prune_every: Takes between prunes, per process
+    """
+
+    def __init__(self, path, idle_seconds=3600, prune_every=500):
+        self.path = path
+        self.idle_seconds = idle_seconds
+        self.prune_every = prune_every
+        self._local = threading.local()
+        self._takes = 0
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)'
+            )
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS shed_counts (route TEXT PRIMARY KEY, count INTEGER NOT NULL)'
+            )
+            self._local.connection = connection
+        return connection
+
+    def take(self, key, capacity, period_seconds, cost=1.0):
+        """
+        Try to take cost tokens from a bucket, refilling it for elapsed time first
+
+        Returns:
+            tuple: (allowed, retry_after_seconds)
+        """
+        refill_rate = capacity / period_seconds
+        now = time.time()
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute('SELECT tokens, updated_at FROM buckets WHERE key = ?', (key,)).fetchone()
+            tokens = capacity if row is None else min(capacity, row[0] + (now - row[1]) * refill_rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            connection.execute(
+                'INSERT OR REPLACE INTO buckets (key, tokens, updated_at) VALUES (?, ?, ?)',
+                (key, tokens, now)
+            )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        self._takes += 1
+        if self._takes % self.prune_every == 0:
+            self.prune(now)
+        retry_after = 0.0 if allowed else (cost - tokens) / refill_rate
+        return allowed, retry_after
+
+    def prune(self, now=None):
+        """Delete buckets idle for longer than idle_seconds; returns the number deleted"""
+        cutoff = (now or time.time()) - self.idle_seconds
+        return self._connection().execute('DELETE FROM buckets WHERE updated_at < ?', (cutoff,)).rowcount
+
+    def record_shed(self, route):
+        self._connection().execute(
+            'INSERT INTO shed_counts (route, count) VALUES (?, 1) '
+            'ON CONFLICT(route) DO UPDATE SET count = count + 1',
+            (route,)
+        )
+
+    def shed_counts(self):
+        return dict(self._connection().execute('SELECT route, count FROM shed_counts').fetchall())
+
+
+class RateLimiter:
+    """
+    Decorator factory applying per-user, per-route token buckets to views
+
+    Args:
+        store: TokenBucketStore shared across workers
+        limits: {route name: (capacity, period_seconds)}
+        enabled: When False every request is admitted
+    """
+
+    def __init__(self, store, limits, enabled=True):
+        self.store = store
+        self.limits = limits
+        self.enabled = enabled
+
+    @classmethod
+    def from_env(cls):
+        path = os.getenv('RATE_LIMIT_DB', os.path.join(tempfile.gettempdir(), 'calmnest_rate_limits.db'))
+        limits = parse_limits(os.getenv('RATE_LIMITS'))
+        return cls(
+            TokenBucketStore(path, idle_seconds=max(period for _, period in limits.values())),
+            limits,
+            enabled=os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+        )
+
+    def limit(self, route, identity=None):
+        """
+        Admit a request only if the caller's bucket for route has a token left
+
+        Args:
+            route: Name of the limit in self.limits
+            identity: Optional callable returning the user the request acts for, or None
+                      to fall back to client_identity()
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if self.enabled and route in self.limits:
+                    capacity, period = self.limits[route]
+                    key = (identity() if identity else None) or client_identity()
+                    try:
+                        allowed, retry_after = self.store.take(f"{route}:{key}", capacity, period)
+                    except sqlite3.Error as e:
+                        # Fail open: admission control must never take the API down
+                        print(f"Rate limit store unavailable, admitting request: {e}")
+                        allowed, retry_after = True, 0
+                    if not allowed:
+                        try:
+                            self.store.record_shed(route)
+                        except sqlite3.Error as e:
+                            print(f"Failed to record shed request for {route}: {e}")
+                        response = jsonify({
+                            'error': 'Too many requests, please slow down',
+                            'retry_after': math.ceil(retry_after)
+                        })
+                        response.status_code = 429
+                        response.headers['Retry-After'] = str(math.ceil(retry_after))
+                        return response
+                return view(*args, **kwargs)
+            return wrapper
+        return decorator
+
+
+def client_identity():
+    """Identify the caller by the user in the JSON body, falling back to the client address"""
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        identity = data.get('userId') or data.get('userEmail')
+        if identity:
+            return str(identity)
+    return client_address()
+
+
+def client_address(trusted_hops=None):
+    """
+    Address of the client as seen by the outermost trusted proxy
+
+    Each trusted proxy appends the address it received the request from, so
+    with n of them the nth entry from the right is the first one the client
+    didn't write itself.
+    """
+    trusted_hops = TRUSTED_PROXY_HOPS if trusted_hops is None else trusted_hops
+    if trusted_hops > 0:
+        forwarded = [address.strip() for address in request.headers.get('X-Forwarded-For', '').split(',')
+                     if address.strip()]
+        if len(forwarded) >= trusted_hops:
+            return forwarded[-trusted_hops]
+    return request.remote_addr or 'unknown'
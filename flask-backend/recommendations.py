@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Recommendations for completed comprehensive assessments
+
+Recommendations depend only on the score profile: the PHQ-9 and GAD-7
+bands and the stress, sleep quality and social support ratings. The
+generator is a pure function of that profile, memoised in a bounded LRU,
+and its output is stored once per profile in recommendation_set. An
+assessment keeps a reference to its set rather than its own JSON copy.
+Clients can fetch a set by id and cache it, because a set never changes.
+
+Assessments completed before this kept the list the client sent in their
+legacy recommendations column. That list is what the user was shown, so it
+is never overwritten: such assessments stay unlinked and keep serving it.
+
+Changing the rules means bumping GENERATOR_VERSION. The version is part of
+the profile key, so new completions get new sets and old assessments keep
+the sets they were shown.
+
+Usage:
+    python recommendations.py backfill      # link completed assessments that have neither a set nor a legacy list
+"""
+import os
+import sys
+from functools import lru_cache
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from cache import TTLCache
+from database import db
+from models import ComprehensiveAssessment, RecommendationSet
+import scoring
+
+GENERATOR_VERSION = 1
+MEMO_SIZE = int(os.getenv('RECOMMENDATION_MEMO_SIZE', 1024))
+BACKFILL_CHUNK_SIZE = 1000
+
+# profile key -> set id, and set id -> recommendations; sets are immutable, so entries only expire for memory
+_set_ids = TTLCache(ttl_seconds=3600, max_entries=MEMO_SIZE)
+_sets = TTLCache(ttl_seconds=3600, max_entries=MEMO_SIZE)
+
+# Worst-band tiers, in the order the base recommendations below are listed
+_TIERS = ('minimal', 'mild', 'moderate', 'severe')
+_PHQ9_TIERS = {'None-Minimal': 0, 'Mild': 1, 'Moderate': 2, 'Moderately Severe': 3, 'Severe': 3}
+_GAD7_TIERS = {'Minimal': 0, 'Mild': 1, 'Moderate': 2, 'Severe': 3}
+
+_BASE = {
+    'minimal': ["Continue current wellness practices",
+                "Maintain regular exercise and sleep schedule",
+                "Practice preventive mental health strategies"],
+    'mild': ["Implement daily stress management techniques",
+             "Consider mindfulness or meditation practice",
+             "Monitor symptoms weekly"],
+    'moderate': ["Consider professional counseling or therapy",
+                 "Implement structured self-care routine",
+                 "Reach out to trusted friends or family for support"],
+    'severe': ["Seek professional mental health support promptly",
+               "Consider medication evaluation with healthcare provider",
+               "Establish crisis support plan"],
+}
+
+
+def _rating(value):
+    """A 1-5 rating, or None if missing or out of range"""
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return None
+    return value if 1 <= value <= 5 else None
+
+
+def score_profile(phq9_score=None, gad7_score=None, stress_score=None, sleep_quality_score=None,
+                  social_support_score=None):
+    """
+    Normalised score profile: (PHQ-9 band, GAD-7 band, stress, sleep quality, social support)
+
+    Bands come from the scores rather than the stored severity labels, so
+    assessments saved with differently worded labels share a profile.
+    Missing parts are None.
+    """
+    return (
+        scoring.PHQ9.severity(phq9_score) if phq9_score is not None else None,
+        scoring.GAD7.severity(gad7_score) if gad7_score is not None else None,
+        _rating(stress_score),
+        _rating(sleep_quality_score),
+        _rating(social_support_score),
+    )
+
+
+def profile_of(assessment):
+    return score_profile(assessment.phq9_score, assessment.gad7_score, assessment.stress_score,
+                         assessment.sleep_quality_score, assessment.social_support_score)
+
+
+def profile_key(profile):
+    phq9, gad7, stress, sleep_quality, social_support = profile
+    return (f"v{GENERATOR_VERSION}:phq9={phq9}:gad7={gad7}:stress={stress}"
+            f":sleep={sleep_quality}:social={social_support}")
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def generate(profile):
+    """
+    Recommendations for a score profile
+
+    Returns:
+        tuple: Recommendation strings, most general first
+    """
+    phq9, gad7, stress, sleep_quality, social_support = profile
+    tier = max(_PHQ9_TIERS.get(phq9, 0), _GAD7_TIERS.get(gad7, 0))
+    recommendations = list(_BASE[_TIERS[tier]])
+
+    if _PHQ9_TIERS.get(phq9, 0) >= 2:
+        recommendations += ["Focus on depression-specific coping strategies",
+                            "Engage in behavioral activation techniques"]
+    if _GAD7_TIERS.get(gad7, 0) >= 2:
+        recommendations += ["Practice anxiety management techniques",
+                            "Learn grounding and breathing exercises"]
+    # Ratings are 1-5; high stress is bad, high sleep quality and social support are good
+    if sleep_quality is not None and sleep_quality <= 2:
+        recommendations += ["Improve sleep hygiene practices",
+                            "Consider sleep disorder evaluation"]
+    if stress is not None and stress >= 4:
+        recommendations += ["Implement stress reduction techniques",
+                            "Identify and address stress triggers"]
+    if social_support is not None and social_support <= 2:
+        recommendations += ["Build stronger social connections",
+                            "Consider joining support groups or communities"]
+    return tuple(recommendations)
+
+
+def recommendation_set_id(profile):
+    """
+    Id of the stored set for a profile, creating it in the current transaction if needed
+
+    Only ids that were already committed are memoised: a set created here
+    would be lost if the caller's transaction rolled back.
+    """
+    key = profile_key(profile)
+    set_id = _set_ids.get(key)
+    if set_id is not None:
+        return set_id
+    set_id = db.session.execute(select(RecommendationSet.id).filter_by(profile_key=key)).scalar()
+    if set_id is not None:
+        _set_ids.set(key, set_id)
+        return set_id
+
+    recommendation_set = RecommendationSet(profile_key=key, recommendations=list(generate(profile)))
+    try:
+        with db.session.begin_nested():
+            db.session.add(recommendation_set)
+    except IntegrityError:
+        # Another worker created it first
+        return db.session.execute(select(RecommendationSet.id).filter_by(profile_key=key)).scalar_one()
+    return recommendation_set.id
+
+
+def recommendations_for(set_id):
+    """Recommendations of a stored set, or None if there's no such set"""
+    if set_id is None:
+        return None
+    recommendations = _sets.get(set_id)
+    if recommendations is None:
+        recommendation_set = db.session.get(RecommendationSet, set_id)
+        if recommendation_set is None:
+            return None
+        recommendations = recommendation_set.recommendations
+        _sets.set(set_id, recommendations)
+    return recommendations
+
+
+def assessment_recommendations(assessment):
+    """An assessment's recommendations, from its set or from the legacy per-row copy"""
+    if assessment.recommendation_set_id is not None:
+        return recommendations_for(assessment.recommendation_set_id)
+    return assessment.recommendations
+
+
+def clear_memo():
+    """Forget memoised set ids, e.g. after the tables were recreated"""
+    _set_ids.invalidate()
+    _sets.invalidate()
+
+
+def backfill(chunk_size=BACKFILL_CHUNK_SIZE):
+    """
+    Link completed assessments that have no set to their profile's set
+
+    Assessments with a legacy list are skipped and keep it.
+
+    Returns:
+        tuple: (assessments linked, assessments skipped because they have a legacy list)
+    """
+    updated = 0
+    kept = 0
+    last_id = 0
+    while True:
+        assessments = ComprehensiveAssessment.query.filter(
+            ComprehensiveAssessment.id > last_id,
+            ComprehensiveAssessment.status == 'completed',
+            ComprehensiveAssessment.recommendation_set_id.is_(None),
+        ).order_by(ComprehensiveAssessment.id).limit(chunk_size).all()
+        if not assessments:
+            return updated, kept
+        for assessment in assessments:
+            if assessment.recommendations:
+                kept += 1
+                continue
+            assessment.recommendation_set_id = recommendation_set_id(profile_of(assessment))
+            updated += 1
+        db.session.commit()
+        last_id = assessments[-1].id
+        print(f"Linked {updated} assessments to recommendation sets, kept {kept} legacy lists")
+
+
+def main():
+    from app import app
+
+    if sys.argv[1:] != ['backfill']:
+        print("Usage: python recommendations.py backfill")
+        sys.exit(2)
+    with app.app_context():
+        print("💡 Linking completed assessments to recommendation sets...")
+        updated, kept = backfill()
+        print(f"✅ {updated} assessment(s) linked, {kept} kept their legacy list, "
+              f"{RecommendationSet.query.count()} distinct set(s)")
+
+
+if __name__ == "__main__":
+    main()
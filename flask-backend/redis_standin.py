@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Minimal in-memory server speaking the Redis protocol (RESP2)
+
+A stand-in for developing and testing CACHE_BACKEND=redis without a Redis
+install. It implements only the commands the cache backend uses (GET, SET
+with EX/PX/NX/XX, DEL, INCR/INCRBY, EXISTS) plus the connection handshake ones;
+data lives in one process and is lost on exit.
+
+Usage:
+    python redis_standin.py --port 6380
+    CACHE_BACKEND=redis CACHE_URL=redis://localhost:6380/0 gunicorn app:app
+"""
+import argparse
+import socketserver
+import threading
+import time
+
+
+class Store:
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key):
+        entry = self._data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self._data[key]
+            return None
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._live(key)
+            return entry[0] if entry else None
+
+    def set(self, key, value, ttl=None, nx=False, xx=False):
+        with self._lock:
+            exists = self._live(key) is not None
+            if (nx and exists) or (xx and not exists):
+                return False
+            self._data[key] = (value, time.monotonic() + ttl if ttl is not None else None)
+            return True
+
+    def delete(self, keys):
+        with self._lock:
+            return sum(1 for key in keys if self._live(key) is not None and self._data.pop(key, None))
+
+    def exists(self, keys):
+        with self._lock:
+            return sum(1 for key in keys if self._live(key) is not None)
+
+    def incr(self, key, amount=1):
+        with self._lock:
+            entry = self._live(key)
+            value = (int(entry[0]) if entry else 0) + amount
+            self._data[key] = (str(value).encode(), entry[1] if entry else None)
+            return value
+
+    def flush(self):
+        with self._lock:
+            self._data.clear()
+
+
+class CommandError(Exception):
+    pass
+
+
+def execute(store, args):
+    """Run one command; returns a Python value encoded by encode()"""
+    command = args[0].decode().upper()
+    if command == 'PING':
+        return 'PONG' if len(args) == 1 else args[1]
+    if command == 'ECHO':
+        return args[1]
+    if command in ('CLIENT', 'SELECT'):
+        return 'OK'
+    if command in ('FLUSHDB', 'FLUSHALL'):
+        store.flush()
+        return 'OK'
+    if command == 'GET':
+        return store.get(args[1])
+    if command == 'SET':
+        ttl, nx, xx = None, False, False
+        options = [a.decode().upper() for a in args[3:]]
+        i = 0
+        while i < len(options):
+            if options[i] in ('EX', 'PX'):
+                ttl = int(options[i + 1]) / (1 if options[i] == 'EX' else 1000)
+                i += 1
+            elif options[i] == 'NX':
+                nx = True
+            elif options[i] == 'XX':
+                xx = True
+            else:
+                raise CommandError(f"ERR unsupported SET option '{options[i]}'")
+            i += 1
+        return 'OK' if store.set(args[1], args[2], ttl, nx, xx) else None
+    if command == 'DEL':
+        return store.delete(args[1:])
+    if command == 'EXISTS':
+        return store.exists(args[1:])
+    if command in ('INCR', 'INCRBY'):
+        try:
+            return store.incr(args[1], int(args[2]) if command == 'INCRBY' else 1)
+        except ValueError:
+            raise CommandError('ERR value is not an integer or out of range')
+    raise CommandError(f"ERR unknown command '{command}'")
+
+
+def encode(value):
+    if value is None:
+        return b'$-1\r\n'
+    if isinstance(value, CommandError):
+        return f"-{value}\r\n".encode()
+    if isinstance(value, str):
+        return f"+{value}\r\n".encode()
+    if isinstance(value, int):
+        return f":{value}\r\n".encode()
+    return b'$%d\r\n%s\r\n' % (len(value), value)
+
+
+class Handler(socketserver.StreamRequestHandler):
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b'*'):
+            # Inline command, e.g. from telnet
+            return line.split()
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        while True:
+            args = self.read_command()
+            if args is None:
+                return
+            if not args:
+                continue
+            try:
+                reply = execute(self.server.store, args)
+            except CommandError as e:
+                reply = e
+            except (IndexError, ValueError):
+                reply = CommandError('ERR wrong number or type of arguments')
+            self.wfile.write(encode(reply))
+
+
+class StandinServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address):
+        super().__init__(address, Handler)
+        self.store = Store()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='In-memory Redis-protocol stand-in')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=6380)
+    args = parser.parse_args()
+    server = StandinServer((args.host, args.port))
+    print(f"🧪 Redis stand-in listening on {args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Read-replica routing for the Flask-SQLAlchemy session
+
+Replicas are configured as SQLALCHEMY_BINDS named replica_0, replica_1, ...
+(see replica_binds). Statements issued while handling GET/HEAD requests go to
+a healthy replica in round-robin order; flushes, writes and anything outside
+a request go to the primary. A read that fails on a replica marks it
+unhealthy and is retried on the primary, as is the rest of that request.
+
+After a write, reads that mention the same user stay on the primary for a
+short window so users see their own changes. The markers live in the cache
+backend (CACHE_BACKEND), so with a shared backend (sqlite or redis) a read
+served by another worker than the write still sees it; the local backend
+only covers the worker that handled the write.
+"""
+import itertools
+import os
+import threading
+import time
+from flask import g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, exc
+from cache_backends import NamespacedCache
+
+REPLICA_BIND_PREFIX = 'replica_'
+READ_METHODS = ('GET', 'HEAD')
+STICKY_SECONDS = float(os.getenv('READ_YOUR_WRITES_SECONDS', 5))
+UNHEALTHY_SECONDS = float(os.getenv('REPLICA_UNHEALTHY_SECONDS', 30))
+
+# Request fields that identify whose data a write touched
+STICKY_BODY_FIELDS = ('userId', 'userEmail', 'email', 'id', 'sessionId')
+
+_sticky_keys = NamespacedCache('sticky_writers', ttl_seconds=STICKY_SECONDS)
+_unhealthy_until = {}
+_health_lock = threading.Lock()
+_round_robin = itertools.count()
+
+
+def replica_binds(replica_urls):
+    """
+    Build SQLALCHEMY_BINDS entries for a comma-separated list of replica URLs
+
+    Args:
+        replica_urls: e.g. the DATABASE_REPLICA_URLS environment variable
+
+    Returns:
+        dict: {'replica_0': url, ...}
+    """
+    urls = [url.strip() for url in (replica_urls or '').split(',') if url.strip()]
+    return {f"{REPLICA_BIND_PREFIX}{i}": url for i, url in enumerate(urls)}
+
+
+def mark_replica_unhealthy(bind_key):
+    with _health_lock:
+        _unhealthy_until[bind_key] = time.monotonic() + UNHEALTHY_SECONDS
+
+
+def healthy_replicas(engines):
+    now = time.monotonic()
+    with _health_lock:
+        return [
+            key for key in sorted(k for k in engines if k and k.startswith(REPLICA_BIND_PREFIX))
+            if _unhealthy_until.get(key, 0) <= now
+        ]
+
+
+def _reads_may_use_replica():
+    if not has_request_context():
+        return False
+    return request.method in READ_METHODS and not g.get('db_use_primary', False)
+
+
+class RoutingSession(Session):
+    """Session that sends request-time reads to replicas and everything else to the primary"""
+
+    _replica_key = None  # Replica bind chosen for the statement being executed
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        self._replica_key = None
+        if bind is None and not self._flushing and _reads_may_use_replica():
+            engines = self._db.engines
+            replicas = healthy_replicas(engines)
+            if replicas:
+                self._replica_key = replicas[next(_round_robin) % len(replicas)]
+                return engines[self._replica_key]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def execute(self, *args, **kwargs):
+        try:
+            return super().execute(*args, **kwargs)
+        except exc.DBAPIError as e:
+            replica_key = self._replica_key
+            failed = isinstance(e, exc.OperationalError) or e.connection_invalidated
+            # Rolling back is only safe while the session holds nothing unflushed
+            if replica_key is None or not failed or self.new or self.dirty or self.deleted:
+                raise
+            print(f"Read from {replica_key} failed, retrying on the primary: {e.orig}")
+            mark_replica_unhealthy(replica_key)
+            g.db_use_primary = True
+            self.rollback()
+            return super().execute(*args, **kwargs)
+
+
+def _request_identities(include_body):
+    identities = {str(value) for value in (request.view_args or {}).values() if value is not None}
+    if include_body:
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            identities.update(str(data[field]) for field in STICKY_BODY_FIELDS if data.get(field))
+    return identities
+
+
+def init_read_routing(app, db):
+    """Register replica health listeners and read-your-writes request hooks"""
+    with app.app_context():
+        for key, engine in db.engines.items():
+            if key and key.startswith(REPLICA_BIND_PREFIX):
+                def on_error(context, key=key):
+                    if context.is_disconnect or isinstance(context.sqlalchemy_exception, exc.OperationalError):
+                        print(f"Replica {key} failed, routing reads to the primary: {context.original_exception}")
+                        mark_replica_unhealthy(key)
+                event.listen(engine, 'handle_error', on_error)
+
+    @app.before_request
+    def pin_recent_writers_to_primary():
+        if request.method in READ_METHODS:
+            if any(_sticky_keys.get(identity) for identity in _request_identities(include_body=False)):
+                g.db_use_primary = True
+
+    @app.after_request
+    def remember_writers(response):
+        if request.method not in READ_METHODS and response.status_code < 400:
+            for identity in _request_identities(include_body=True):
+                _sticky_keys.set(identity, True)
+        return response
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """
-Quick script to run the comprehensive assessment migration
+Quick script to apply pending database migrations from the repository root
 """
 
 import subprocess
@@ -8,13 +8,13 @@ import sys
 import os
 
 def run_migration():
-    """Run the comprehensive assessment migration"""
+    """Run the versioned migration runner"""
     try:
         # Change to flask-backend directory
-        os.chdir('flask-backend')
+        os.chdir(os.path.dirname(os.path.abspath(__file__)))
         
-        # Run the migration script
-        result = subprocess.run([sys.executable, 'migrate_comprehensive_assessment.py'], 
+        # Run the migration runner
+        result = subprocess.run([sys.executable, 'migrations.py'], 
                               capture_output=True, text=True)
         
         print("Migration Output:")
@@ -31,11 +31,11 @@ def run_migration():
         return False
 
 if __name__ == '__main__':
-    print("🚀 Running Comprehensive Assessment Migration...")
+    print("🚀 Running database migrations...")
     success = run_migration()
     
     if success:
         print("✅ Migration completed successfully!")
     else:
         print("❌ Migration failed!")
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Server-side scoring of questionnaire answers
+
+Scores and severity bands are computed here from the stored answers rather
+than taken from the client, so changing a threshold only needs a rescore:
+
+    python scoring.py rescore                       # every table
+    python scoring.py rescore test_submission --dry-run
+    python scoring.py rescore comprehensive_assessment --chunk-size 20000
+
+Rescoring walks a table in id order RESCORE_CHUNK_SIZE rows at a time. Each
+chunk's answers become one item matrix per instrument; totals are a row sum
+and bands a searchsorted over the band upper bounds. Only the rows whose
+score or severity changed are written back, with one executemany per chunk
+in the same short transaction that read it, with a new updated_at so the
+dashboard changes feed and incremental exports pick the rows up again.
+Rows whose answers can't be scored are left as they are and counted.
+
+Answers are accepted in the shapes the clients send: a list of
+{'score': n} items (PHQ-9, GAD-7), of {'answer': 'n'} items (additional
+assessments), or of bare numbers.
+"""
+import os
+import re
+import sys
+from dataclasses import dataclass
+from datetime import datetime
+import numpy as np
+from sqlalchemy import bindparam, select
+from database import db
+from models import ComprehensiveAssessment, TestSubmission
+
+RESCORE_CHUNK_SIZE = int(os.getenv('RESCORE_CHUNK_SIZE', 5000))
+
+
+class ScoringError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Instrument:
+    """
+    A questionnaire with a fixed number of items, each answered on an integer scale
+
+    bands are (upper bound, label) pairs in ascending order; a total belongs
+    to the first band whose upper bound it doesn't exceed.
+    """
+    name: str
+    items: int
+    min_value: int
+    max_value: int
+    bands: tuple = ()
+
+    def severity(self, score):
+        for upper, label in self.bands:
+            if score <= upper:
+                return label
+        return self.bands[-1][1] if self.bands else None
+
+
+PHQ9 = Instrument('PHQ-9', 9, 0, 3, (
+    (4, 'None-Minimal'), (9, 'Mild'), (14, 'Moderate'), (19, 'Moderately Severe'), (27, 'Severe')
+))
+GAD7 = Instrument('GAD-7', 7, 0, 3, ((4, 'Minimal'), (9, 'Mild'), (14, 'Moderate'), (21, 'Severe')))
+
+# Single 1-5 ratings from the comprehensive assessment; they have no bands
+ADDITIONAL_INSTRUMENTS = {
+    'resilience': Instrument('resilience', 1, 1, 5),
+    'stress': Instrument('stress', 1, 1, 5),
+    'sleep_quality': Instrument('sleep_quality', 1, 1, 5),
+    'social_support': Instrument('social_support', 1, 1, 5),
+}
+
+# Keyed by test type with punctuation dropped: clients send both 'PHQ-9' and 'PHQ9'
+_TEST_TYPES = {'PHQ9': PHQ9, 'GAD7': GAD7}
+
+
+def instrument_for_test_type(test_type):
+    """Instrument for a test_submission.test_type, or None if it isn't one we score"""
+    return _TEST_TYPES.get(re.sub(r'[^A-Z0-9]', '', str(test_type or '').upper()))
+
+
+def _item_value(answer):
+    if isinstance(answer, dict):
+        answer = answer.get('score', answer.get('answer', answer.get('value')))
+    if isinstance(answer, bool):
+        raise ScoringError(f"Invalid answer value: {answer!r}")
+    try:
+        value = float(answer)
+    except (TypeError, ValueError):
+        raise ScoringError(f"Invalid answer value: {answer!r}")
+    if not value.is_integer():
+        raise ScoringError(f"Invalid answer value: {answer!r}")
+    return int(value)
+
+
+def item_values(instrument, answers):
+    """
+    Validated per-item values of one set of answers
+
+    Raises:
+        ScoringError: Wrong number of answers or a value outside the instrument's scale
+    """
+    if not isinstance(answers, (list, tuple)):
+        raise ScoringError(f"{instrument.name} answers must be a list")
+    if len(answers) != instrument.items:
+        raise ScoringError(f"{instrument.name} needs {instrument.items} answers, got {len(answers)}")
+    values = [_item_value(answer) for answer in answers]
+    for value in values:
+        if not instrument.min_value <= value <= instrument.max_value:
+            raise ScoringError(
+                f"{instrument.name} answers must be between {instrument.min_value} and {instrument.max_value}"
+            )
+    return values
+
+
+def score_answers(instrument, answers):
+    """
+    Score one set of answers
+
+    Returns:
+        tuple: (score, severity); severity is None for instruments without bands
+    """
+    score = sum(item_values(instrument, answers))
+    return score, instrument.severity(score)
+
+
+def answer_matrix(instrument, answer_lists):
+    """
+    Stack answer lists into an (n, items) matrix
+
+    Returns:
+        tuple: (matrix, valid) where valid flags the rows that could be parsed;
+        invalid rows are left as zeros
+    """
+    matrix = np.zeros((len(answer_lists), instrument.items), dtype=np.int16)
+    valid = np.zeros(len(answer_lists), dtype=bool)
+    for i, answers in enumerate(answer_lists):
+        try:
+            matrix[i] = item_values(instrument, answers)
+            valid[i] = True
+        except ScoringError:
+            pass
+    return matrix, valid
+
+
+def score_matrix(instrument, matrix):
+    """
+    Score an (n, items) matrix of item values
+
+    Returns:
+        tuple: (scores, severities) arrays; severities is None for instruments without bands
+    """
+    scores = matrix.sum(axis=1, dtype=np.int32)
+    if not instrument.bands:
+        return scores, None
+    uppers = np.array([upper for upper, _ in instrument.bands])
+    labels = np.array([label for _, label in instrument.bands], dtype=object)
+    band_index = np.minimum(np.searchsorted(uppers, scores, side='left'), len(labels) - 1)
+    return scores, labels[band_index]
+
+
+def score_batch(instrument, answer_lists):
+    """
+    Score many sets of answers at once
+
+    Returns:
+        tuple: (valid, scores, severities) arrays aligned with answer_lists
+    """
+    matrix, valid = answer_matrix(instrument, answer_lists)
+    scores, severities = score_matrix(instrument, matrix)
+    return valid, scores, severities
+
+
+def _chunks(table, columns, chunk_size):
+    """
+    Yield (connection, rows) in id order, chunk_size rows at a time
+
+    Each chunk is read and written back in its own short transaction, so a
+    long rescore never holds one snapshot open.
+    """
+    last_id = 0
+    while True:
+        with db.engine.begin() as connection:
+            rows = connection.execute(
+                select(table.c.id, *columns).where(table.c.id > last_id).order_by(table.c.id).limit(chunk_size)
+            ).all()
+            if not rows:
+                return
+            yield connection, rows
+        last_id = rows[-1].id
+
+
+def _apply(connection, table, updates, columns, dry_run):
+    if not updates or dry_run:
+        return
+    # Incremental readers (delta sync, exports) find changed rows by updated_at
+    statement = table.update().where(table.c.id == bindparam('b_id')).values(
+        updated_at=datetime.utcnow(), **{column: bindparam(f'b_{column}') for column in columns}
+    )
+    connection.execute(statement, updates)
+
+
+def rescore_test_submissions(chunk_size=RESCORE_CHUNK_SIZE, dry_run=False):
+    """
+    Recompute test_submission.score and severity from answers
+
+    Changed rows get a new updated_at, like rescored comprehensive assessments.
+
+    Returns:
+        dict: Row counts: scanned, changed, unscorable (bad answers), skipped (unknown test type)
+    """
+    table = TestSubmission.__table__
+    counts = {'scanned': 0, 'changed': 0, 'unscorable': 0, 'skipped': 0}
+    columns = [table.c.test_type, table.c.answers, table.c.score, table.c.severity]
+    for connection, rows in _chunks(table, columns, chunk_size):
+        counts['scanned'] += len(rows)
+        by_instrument = {}
+        for row in rows:
+            instrument = instrument_for_test_type(row.test_type)
+            if instrument is None:
+                counts['skipped'] += 1
+            else:
+                by_instrument.setdefault(instrument, []).append(row)
+
+        updates = []
+        for instrument, group in by_instrument.items():
+            valid, scores, severities = score_batch(instrument, [row.answers for row in group])
+            counts['unscorable'] += int((~valid).sum())
+            for i in np.flatnonzero(valid):
+                row = group[i]
+                score, severity = int(scores[i]), severities[i]
+                if row.score != score or row.severity != severity:
+                    updates.append({'b_id': row.id, 'b_score': score, 'b_severity': severity})
+
+        counts['changed'] += len(updates)
+        _apply(connection, table, updates, ('score', 'severity'), dry_run)
+    return counts
+
+
+def rescore_comprehensive_assessments(chunk_size=RESCORE_CHUNK_SIZE, dry_run=False):
+    """
+    Recompute the PHQ-9, GAD-7 and additional assessment scores of comprehensive_assessment
+
+    Each instrument is scored independently: a row whose GAD-7 answers are
+    missing still has its PHQ-9 rescored. Changed rows get a new updated_at,
+    so the dashboard changes feed picks them up.
+
+    Returns:
+        dict: Row counts: scanned, changed, unscorable (rows with answers that couldn't be scored)
+    """
+    table = ComprehensiveAssessment.__table__
+    # (instrument, answers column, score column, severity column or None)
+    targets = [(PHQ9, 'phq9_answers', 'phq9_score', 'phq9_severity'),
+               (GAD7, 'gad7_answers', 'gad7_score', 'gad7_severity')]
+    targets += [(instrument, f'{name}_answers', f'{name}_score', None)
+                for name, instrument in ADDITIONAL_INSTRUMENTS.items()]
+    columns = [table.c[name] for _, answers, score, severity in targets
+               for name in (answers, score, severity) if name]
+    value_columns = [name for _, _, score, severity in targets for name in (score, severity) if name]
+
+    counts = {'scanned': 0, 'changed': 0, 'unscorable': 0}
+    for connection, rows in _chunks(table, columns, chunk_size):
+        counts['scanned'] += len(rows)
+        new_values = {row.id: {name: getattr(row, name) for name in value_columns} for row in rows}
+        unscorable = set()
+        for instrument, answers_column, score_column, severity_column in targets:
+            group = [row for row in rows if getattr(row, answers_column) is not None]
+            if not group:
+                continue
+            valid, scores, severities = score_batch(instrument, [getattr(row, answers_column) for row in group])
+            for i, row in enumerate(group):
+                if not valid[i]:
+                    unscorable.add(row.id)
+                    continue
+                new_values[row.id][score_column] = int(scores[i])
+                if severity_column:
+                    new_values[row.id][severity_column] = severities[i]
+
+        updates = []
+        for row in rows:
+            values = new_values[row.id]
+            if any(getattr(row, name) != values[name] for name in value_columns):
+                updates.append({'b_id': row.id, **{f'b_{name}': value for name, value in values.items()}})
+        counts['changed'] += len(updates)
+        counts['unscorable'] += len(unscorable)
+        _apply(connection, table, updates, value_columns, dry_run)
+    return counts
+
+
+RESCORERS = {
+    'test_submission': rescore_test_submissions,
+    'comprehensive_assessment': rescore_comprehensive_assessments,
+}
+
+
+def main():
+    import time
+    from app import analytics_cache, app
+
+    args = sys.argv[1:]
+    if not args or args[0] != 'rescore':
+        print("Usage: python scoring.py rescore [test_submission|comprehensive_assessment] "
+              "[--chunk-size N] [--dry-run]")
+        sys.exit(2)
+    args = args[1:]
+    dry_run = '--dry-run' in args
+    chunk_size = RESCORE_CHUNK_SIZE
+    if '--chunk-size' in args:
+        chunk_size = int(args[args.index('--chunk-size') + 1])
+    tables = [arg for arg in args if arg in RESCORERS] or list(RESCORERS)
+
+    with app.app_context():
+        for name in tables:
+            print(f"🧮 Rescoring {name}{' (dry run)' if dry_run else ''}...")
+            started = time.perf_counter()
+            counts = RESCORERS[name](chunk_size=chunk_size, dry_run=dry_run)
+            print(f"✅ {name}: {counts} in {time.perf_counter() - started:.1f}s")
+        if not dry_run:
+            # Severity distributions and percentiles were computed from the old scores
+            analytics_cache.invalidate()
+
+
+if __name__ == "__main__":
+    main()
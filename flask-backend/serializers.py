@@ -0,0 +1,231 @@
+"""
+Declarative response serializers shared by the Flask (WSGI) and Starlette (ASGI) read paths
+
+Each Serializer lists the fields a response exposes for one model. Field
+lists are compiled once into (key, attribute, is_datetime) tuples, and the
+same list drives both the dict building and the SQL SELECT list (via
+load_only), so sparse fieldsets skip the JSON columns a client didn't ask for.
+
+Clients pick fields with ?fields=score,timestamp (applied to every section
+of a response) or ?fields[test_submissions]=score,timestamp (one section).
+Unknown names are ignored and 'id' is always included.
+"""
+from sqlalchemy import DateTime
+from sqlalchemy.orm import load_only
+from models import (
+    BreathingExerciseLog, ComprehensiveAssessment, FacialAnalysisSession, Feedback, ForumPost,
+    MoodGrooveResult, Profile, TestSubmission
+)
+from utils import safe_getattr, safe_isoformat
+
+ALWAYS_INCLUDED = ('id',)
+MAX_COMPILED_SUBSETS = 64
+
+
+class Serializer:
+    """
+    Row-to-dict mapping for one model
+
+    Args:
+        model: Mapped class
+        fields: Field names; a (key, attribute) pair renames an attribute in the output
+        constants: Extra keys with fixed values, always included
+    """
+
+    def __init__(self, model, fields, constants=None):
+        self.model = model
+        self.constants = dict(constants or {})
+        columns = model.__table__.columns
+        self._fields = tuple(
+            (key, attribute, isinstance(columns[attribute].type, DateTime))
+            for key, attribute in (f if isinstance(f, tuple) else (f, f) for f in fields)
+        )
+        self.keys = tuple(key for key, _, _ in self._fields)
+        self._compiled = {None: self._fields}
+
+    def only(self, *keys):
+        """A serializer for a subset of this one's fields, in this one's order"""
+        return Serializer(self.model, [(k, a) for k, a, _ in self._fields if k in keys], self.constants)
+
+    def without(self, *keys):
+        return self.only(*(k for k in self.keys if k not in keys))
+
+    def fields_for(self, requested, section=None):
+        """
+        Resolve parsed ?fields= parameters to this serializer's keys
+
+        Returns:
+            tuple: Selected keys, or None for every field
+        """
+        names = requested.get(section, requested.get(None)) if requested else None
+        if names is None:
+            return None
+        return tuple(k for k in self.keys if k in names or k in ALWAYS_INCLUDED)
+
+    def _fields_for_keys(self, keys):
+        compiled = self._compiled.get(keys)
+        if compiled is None:
+            wanted = set(keys)
+            compiled = tuple(f for f in self._fields if f[0] in wanted)
+            if len(self._compiled) < MAX_COMPILED_SUBSETS:
+                self._compiled[keys] = compiled
+        return compiled
+
+    def load_options(self, keys=None):
+        """load_only() option restricting the SELECT list to the columns these keys need"""
+        attributes = {attribute for _, attribute, _ in self._fields_for_keys(keys)}
+        attributes.update(c.key for c in self.model.__table__.primary_key.columns)
+        return load_only(*(getattr(self.model, attribute) for attribute in sorted(attributes)))
+
+    def dump(self, obj, keys=None):
+        data = {}
+        for key, attribute, is_datetime in self._fields_for_keys(keys):
+            value = safe_getattr(obj, attribute)
+            data[key] = safe_isoformat(value) if is_datetime else value
+        data.update(self.constants)
+        return data
+
+    def dump_many(self, objs, keys=None):
+        return [self.dump(obj, keys) for obj in objs]
+
+
+def parse_fields(args):
+    """
+    Parse sparse fieldset parameters from a query-string mapping
+
+    Returns:
+        dict: {None: names} for ?fields=, {section: names} for ?fields[section]=
+    """
+    requested = {}
+    for key, value in args.items():
+        if key == 'fields':
+            section = None
+        elif key.startswith('fields[') and key.endswith(']'):
+            section = key[len('fields['):-1]
+        else:
+            continue
+        requested[section] = {name.strip() for name in value.split(',') if name.strip()}
+    return requested
+
+
+def serialize_all(items, serializer, section, keys=None):
+    """Serialize a list, returning [] (and logging) if any item fails"""
+    try:
+        return serializer.dump_many(items, keys)
+    except Exception as e:
+        print(f"Error processing {section}: {e}")
+        return []
+
+
+TEST_SUBMISSION = Serializer(TestSubmission, [
+    'id', 'user_id', 'test_type', 'score', 'severity', 'answers', 'timestamp'
+])
+
+MOOD_GROOVE_RESULT = Serializer(MoodGrooveResult, [
+    'id', 'user_id', 'user_email', 'dominant_mood', 'confidence', 'depression', 'anxiety', 'expressions', 'timestamp'
+])
+
+MOOD_GROOVE_HISTORY = Serializer(MoodGrooveResult, [
+    'id', 'dominant_mood', 'confidence', 'depression', 'anxiety', 'expressions', ('created_at', 'timestamp')
+])
+
+BREATHING_EXERCISE = Serializer(BreathingExerciseLog, [
+    'id', 'user_id', 'exercise_name', 'duration_seconds', 'timestamp'
+])
+
+FACIAL_ANALYSIS_SESSION = Serializer(FacialAnalysisSession, [
+    'id', 'user_email', 'session_start_time', 'session_end_time', 'total_detections', 'dominant_mood',
+    'avg_confidence', 'avg_depression', 'avg_anxiety', 'mood_distribution', 'raw_data', 'timestamp'
+])
+
+COMPREHENSIVE_ASSESSMENT = Serializer(ComprehensiveAssessment, [
+    'id', 'session_id', 'status', 'started_at', 'completed_at',
+    'phq9_score', 'phq9_severity', 'gad7_score', 'gad7_severity',
+    'mood_groove_dominant_mood', 'mood_groove_confidence', 'mood_groove_depression', 'mood_groove_anxiety',
+    'resilience_score', 'stress_score', 'sleep_quality_score', 'social_support_score',
+    'overall_severity', 'risk_level', 'analysis_prompt', 'recommendation_set_id', 'timestamp'
+])
+
+COMPREHENSIVE_ASSESSMENT_LISTING = COMPREHENSIVE_ASSESSMENT.only(
+    'id', 'session_id', 'status', 'started_at', 'completed_at', 'overall_severity', 'risk_level',
+    'phq9_score', 'gad7_score', 'mood_groove_dominant_mood', 'recommendation_set_id'
+)
+
+DASHBOARD_PROFILE = Serializer(Profile, ['id', 'email', 'full_name', 'age', 'gender', 'updated_at'])
+
+PROFILE = Serializer(Profile, ['id', 'email', 'full_name', 'age', 'gender', 'created_at', 'updated_at'])
+
+FORUM_POST = Serializer(
+    ForumPost, ['id', 'title', 'content', 'author', 'category', 'timestamp'],
+    constants={'replyCount': 0}  # Placeholder for reply count
+)
+
+FEATURED_FEEDBACK = Serializer(Feedback, ['id', 'user_name', 'feedback_text', 'rating', 'timestamp'])
+
+
+UNIFIED_DASHBOARD_SECTIONS = {
+    'test_submissions': TEST_SUBMISSION,
+    'mood_groove_results': MOOD_GROOVE_RESULT,
+    'breathing_exercises': BREATHING_EXERCISE,
+    'facial_analysis_sessions': FACIAL_ANALYSIS_SESSION,
+    'comprehensive_assessments': COMPREHENSIVE_ASSESSMENT,
+}
+
+# /api/dashboard/overall/<user_id> and /dashboard/<user_id>
+USER_DASHBOARD_SECTIONS = {
+    'test_submissions': TEST_SUBMISSION,
+    'mood_groove_results': MOOD_GROOVE_RESULT.without('user_email'),
+    'breathing_exercises': BREATHING_EXERCISE,
+}
+
+# /api/dashboard/<user_email> leaves out the large JSON columns by default
+EMAIL_DASHBOARD_SECTIONS = {
+    'test_submissions': TEST_SUBMISSION,
+    'mood_groove_results': MOOD_GROOVE_RESULT.without('expressions'),
+    'breathing_exercises': BREATHING_EXERCISE,
+    'comprehensive_assessments': COMPREHENSIVE_ASSESSMENT.without('analysis_prompt'),
+    'facial_analysis_sessions': FACIAL_ANALYSIS_SESSION.without('mood_distribution', 'raw_data'),
+}
+
+
+def section_fields(sections, args):
+    """
+    Resolve ?fields= for every section of a response
+
+    Returns:
+        dict: {section: keys or None}
+    """
+    requested = parse_fields(args)
+    return {name: serializer.fields_for(requested, name) for name, serializer in sections.items()}
+
+
+def dump_sections(sections, rows, fields):
+    """Serialize {section: rows} with each section's serializer and selected keys"""
+    return {
+        name: serialize_all(rows[name], serializer, name.replace('_', ' '), fields.get(name))
+        for name, serializer in sections.items()
+    }
+
+
+def unified_dashboard(test_submissions, mood_results, breathing_logs, facial_sessions,
+                      comprehensive_assessments, user_profile, fields=None):
+    """Response body of the unified dashboard, built from already-loaded rows"""
+    response_data = {
+        'test_count': len(test_submissions),
+        'total_sessions': len(facial_sessions),
+        'comprehensive_assessments_count': len(comprehensive_assessments),
+        **dump_sections(UNIFIED_DASHBOARD_SECTIONS, {
+            'test_submissions': test_submissions,
+            'mood_groove_results': mood_results,
+            'breathing_exercises': breathing_logs,
+            'facial_analysis_sessions': facial_sessions,
+            'comprehensive_assessments': comprehensive_assessments,
+        }, fields or {}),
+        'user_profile': None
+    }
+    try:
+        if user_profile:
+            response_data['user_profile'] = DASHBOARD_PROFILE.dump(user_profile)
+    except Exception as e:
+        print(f"Error processing user profile: {e}")
+    return response_data
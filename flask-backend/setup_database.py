@@ -36,7 +36,7 @@ def setup_database():
 if __name__ == "__main__":
     if setup_database():
         print("\n🎉 Database setup completed!")
-        print("💡 Now run: python migrate_database.py (if needed)")
+        print("💡 Now run: python migrations.py")
     else:
         print("\n💥 Database setup failed!")
         exit(1)
\ No newline at end of file
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Behaviour checks shared by every cache backend
+
+Runs the same checks against the local, SQLite and Redis-protocol backends.
+The Redis backend is tested against redis_standin.py, started in-process, so
+no Redis server is needed.
+
+Usage:
+    python test_cache_backends.py
+"""
+
+import os
+import tempfile
+import threading
+import time
+from cache_backends import LocalBackend, NamespacedCache, RedisBackend, SQLiteBackend
+from redis_standin import StandinServer
+
+
+def check_backend(name, backend):
+    print(f"🧪 {name} backend...")
+    cache = NamespacedCache(f'test-{name}', ttl_seconds=60, backend=backend)
+
+    cache.set('counts', {'General': 2})
+    assert cache.get('counts') == {'General': 2}, "value round-trips"
+
+    assert cache.update('counts', lambda c: {**c, 'General': c['General'] + 1})
+    assert cache.get('counts') == {'General': 3}, "update applies in place"
+    assert not cache.update('missing', lambda c: c), "update skips absent keys"
+
+    def racing_increment(counts):
+        # Another caller updates while this one holds the lock: its change can't be applied
+        assert not cache.update('counts', lambda c: {**c, 'General': c['General'] + 1})
+        return {**counts, 'General': counts['General'] + 1}
+
+    assert not cache.update('counts', racing_increment), "holder reports a contended update"
+    assert cache.get('counts') is None, "contended update leaves no stale value"
+
+    cache.set('short', 'x', ttl_seconds=1)
+    time.sleep(1.1)
+    assert cache.get('short') is None, "entries expire"
+
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.invalidate('a')
+    assert cache.get('a') is None and cache.get('b') == 2, "invalidate(key) drops one key"
+    cache.invalidate()
+    assert cache.get('b') is None, "invalidate() drops the namespace"
+
+    calls = []
+
+    def slow_compute():
+        calls.append(1)
+        time.sleep(0.3)
+        return {'value': 42}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_set('report', slow_compute)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [{'value': 42}] * 8, "every caller gets the value"
+    assert len(calls) == 1, f"value computed once under contention, not {len(calls)} times"
+
+    print(f"✅ {name} backend passed")
+
+
+def test_cache_backends():
+    server = StandinServer(('127.0.0.1', 0))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    sqlite_path = os.path.join(tempfile.mkdtemp(), 'cache.db')
+
+    failures = []
+    for name, backend in [
+        ('local', LocalBackend()),
+        ('sqlite', SQLiteBackend(sqlite_path)),
+        ('redis', RedisBackend(f'redis://127.0.0.1:{server.server_address[1]}/0')),
+    ]:
+        try:
+            check_backend(name, backend)
+        except AssertionError as e:
+            failures.append(name)
+            print(f"❌ {name} backend: {e}")
+
+    server.shutdown()
+    print(f"\n🎉 Cache backend checks completed with {len(failures)} failure(s)")
+    assert not failures, f"Failing backends: {', '.join(failures)}"
+
+
+if __name__ == "__main__":
+    test_cache_backends()
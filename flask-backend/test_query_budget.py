@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Per-route SQL statement budgets
+
+Runs the read routes in-process against the configured database and fails
+if any route runs more statements than its budget. Raise a budget only when
+a new query is intentional.
+
+Usage:
+    DATABASE_URL=sqlite:///bench.db python test_query_budget.py
+"""
+
+from app import app
+from query_stats import QueryBudgetExceeded, query_budget
+
+TEST_USER_ID = 'test-user-123'
+TEST_USER_EMAIL = 'test@example.com'
+
+# Routes reading the profile cache may also read the cache_version stamp (one statement)
+ROUTE_BUDGETS = [
+    (f'/api/dashboard/unified/{TEST_USER_ID}/{TEST_USER_EMAIL}', 8),
+    (f'/api/dashboard/overall/{TEST_USER_ID}', 3),
+    (f'/dashboard/{TEST_USER_ID}', 3),
+    (f'/api/dashboard/{TEST_USER_EMAIL}', 7),
+    (f'/api/mood-groove/history/{TEST_USER_ID}', 1),
+    (f'/api/profile/{TEST_USER_ID}', 2),
+    ('/api/forum', 1),
+    ('/api/feedback', 1),
+]
+
+
+def test_query_budgets():
+    print("🧪 Checking per-route SQL statement budgets...")
+    client = app.test_client()
+    failures = []
+    for path, budget in ROUTE_BUDGETS:
+        try:
+            with query_budget(budget) as stats:
+                response = client.get(path)
+            print(f"✅ {path}: {stats.count}/{budget} statements (HTTP {response.status_code})")
+            for shape, n in stats.repeated():
+                print(f"   ⚠️  repeated {n}x: {shape[:120]}")
+        except QueryBudgetExceeded as e:
+            failures.append(path)
+            print(f"❌ {path}: {e}")
+
+    print(f"\n🎉 Query budget check completed with {len(failures)} failure(s)")
+    assert not failures, f"Over budget: {', '.join(failures)}"
+
+
+if __name__ == "__main__":
+    test_query_budgets()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Checks for the questionnaire scoring engine
+
+Compares the vectorised batch scoring with one-at-a-time scoring on random
+answers, and checks band edges and the answer shapes the clients send.
+
+Usage:
+    python test_scoring.py
+"""
+
+import numpy as np
+import scoring
+
+
+def check(description, condition):
+    print(f"{'✅' if condition else '❌'} {description}")
+    return description, condition
+
+
+def test_scoring():
+    print("🧪 Testing questionnaire scoring...")
+    results = []
+
+    # Band edges: the upper bound belongs to its band
+    results.append(check("PHQ-9 bands", [scoring.PHQ9.severity(s) for s in (0, 4, 5, 9, 10, 14, 15, 19, 20, 27)] == [
+        'None-Minimal', 'None-Minimal', 'Mild', 'Mild', 'Moderate', 'Moderate',
+        'Moderately Severe', 'Moderately Severe', 'Severe', 'Severe']))
+    results.append(check("GAD-7 bands", [scoring.GAD7.severity(s) for s in (4, 5, 14, 15, 21)] == [
+        'Minimal', 'Mild', 'Moderate', 'Severe', 'Severe']))
+
+    # Answer shapes sent by the clients
+    results.append(check("{'score': n} answers", scoring.score_answers(
+        scoring.GAD7, [{'question': 'q', 'option': 'Several days', 'score': 1}] * 7) == (7, 'Mild')))
+    results.append(check("bare number answers", scoring.score_answers(
+        scoring.PHQ9, [2, 1, 2, 1, 2, 1, 2, 1, 1]) == (13, 'Moderate')))
+    results.append(check("{'answer': 'n'} answers", scoring.score_answers(
+        scoring.ADDITIONAL_INSTRUMENTS['stress'], [{'question': 'Stress level assessment', 'answer': '4'}]) == (4, None)))
+    results.append(check("test types with and without a hyphen",
+                         scoring.instrument_for_test_type('PHQ9') is scoring.instrument_for_test_type('PHQ-9')
+                         is scoring.PHQ9 and scoring.instrument_for_test_type('other') is None))
+
+    for bad in ([1] * 8, [4] + [0] * 8, ['x'] * 9, [0.5] * 9, None):
+        try:
+            scoring.score_answers(scoring.PHQ9, bad)
+            results.append(check(f"rejects {bad!r}", False))
+        except scoring.ScoringError:
+            results.append(check(f"rejects {bad!r}", True))
+
+    # Batch scoring agrees with scoring one at a time, and flags bad rows
+    rng = np.random.default_rng(7)
+    answer_lists = [[{'score': int(v)} for v in row] for row in rng.integers(0, 4, size=(2000, 9))]
+    answer_lists[5] = [{'score': 9}] * 9
+    valid, scores, severities = scoring.score_batch(scoring.PHQ9, answer_lists)
+    expected = [None if i == 5 else scoring.score_answers(scoring.PHQ9, answers)
+                for i, answers in enumerate(answer_lists)]
+    results.append(check("batch flags invalid rows", not valid[5] and valid.sum() == len(answer_lists) - 1))
+    results.append(check("batch matches one-at-a-time scoring", all(
+        (int(scores[i]), severities[i]) == expected[i] for i in range(len(answer_lists)) if valid[i])))
+
+    failures = [description for description, passed in results if not passed]
+    print(f"\n🎉 Scoring checks completed with {len(failures)} failure(s)")
+    assert not failures, f"Failed checks: {', '.join(failures)}"
+
+
+if __name__ == "__main__":
+    test_scoring()
@@ -0,0 +1,182 @@
+"""
+Vectorised per-user mood trend analytics
+
+A user's depression, anxiety and confidence series are loaded with one
+columnar query per source into NumPy arrays and reduced to a compact
+summary: rolling mean, exponentially weighted average, linear slope and
+anomaly flags. No per-point Python loops run on the request path.
+"""
+import numpy as np
+from sqlalchemy import or_, select
+from database import db
+from models import FacialAnalysisSession, MoodGrooveResult
+from utils import time_range_conditions
+
+METRICS = ('depression', 'anxiety', 'confidence')
+DEFAULT_WINDOW = 7
+DEFAULT_SPAN = 10
+DEFAULT_Z_THRESHOLD = 2.5
+MAX_RECENT_ANOMALIES = 10
+SECONDS_PER_DAY = 86400.0
+
+
+def load_mood_groove_series(user_id, user_email=None, since=None, until=None):
+    """
+    Load a user's mood groove series ordered by time, optionally within [since, until)
+
+    Returns:
+        tuple: (timestamps as datetime64[us] array, {metric: float64 array})
+    """
+    condition = MoodGrooveResult.user_id == user_id
+    if user_email:
+        condition = or_(condition, MoodGrooveResult.user_email == user_email)
+    rows = db.session.execute(
+        select(MoodGrooveResult.timestamp, MoodGrooveResult.depression,
+               MoodGrooveResult.anxiety, MoodGrooveResult.confidence)
+        .where(condition, MoodGrooveResult.timestamp.isnot(None),
+               *time_range_conditions(MoodGrooveResult.timestamp, since, until))
+        .order_by(MoodGrooveResult.timestamp)
+    ).all()
+    return _to_arrays(rows)
+
+
+def load_facial_analysis_series(user_email, since=None, until=None):
+    """Load a user's facial analysis session averages ordered by time, optionally within [since, until)"""
+    rows = db.session.execute(
+        select(FacialAnalysisSession.session_start_time, FacialAnalysisSession.avg_depression,
+               FacialAnalysisSession.avg_anxiety, FacialAnalysisSession.avg_confidence)
+        .where(FacialAnalysisSession.user_email == user_email,
+               *time_range_conditions(FacialAnalysisSession.session_start_time, since, until))
+        .order_by(FacialAnalysisSession.session_start_time)
+    ).all()
+    return _to_arrays(rows)
+
+
+def _to_arrays(rows):
+    if not rows:
+        return np.array([], dtype='datetime64[us]'), {metric: np.array([], dtype=np.float64) for metric in METRICS}
+    timestamps, *columns = zip(*rows)
+    return (
+        np.array(timestamps, dtype='datetime64[us]'),
+        {metric: np.asarray(column, dtype=np.float64) for metric, column in zip(METRICS, columns)}
+    )
+
+
+def rolling_mean(values, window):
+    """Trailing mean over each full window, via a cumulative sum"""
+    if len(values) < window:
+        return np.array([], dtype=np.float64)
+    cumulative = np.concatenate(([0.0], np.cumsum(values)))
+    return (cumulative[window:] - cumulative[:-window]) / window
+
+
+def ewma_last(values, span):
+    """Final value of the bias-adjusted exponentially weighted moving average"""
+    alpha = 2.0 / (span + 1.0)
+    weights = (1.0 - alpha) ** np.arange(len(values) - 1, -1, -1, dtype=np.float64)
+    return float(np.dot(weights, values) / weights.sum())
+
+
+def linear_slope(x, y):
+    """Least-squares slope of y against x"""
+    x_centered = x - x.mean()
+    denominator = np.dot(x_centered, x_centered)
+    if denominator == 0:
+        return 0.0
+    return float(np.dot(x_centered, y - y.mean()) / denominator)
+
+
+def anomaly_mask(values, window, z_threshold):
+    """
+    Flag points that sit more than z_threshold standard deviations away
+    from the mean of the window of points before them
+
+    Returns:
+        tuple: (boolean mask aligned with values, z-scores aligned with values)
+    """
+    n = len(values)
+    mask = np.zeros(n, dtype=bool)
+    z_scores = np.zeros(n, dtype=np.float64)
+    if n <= window:
+        return mask, z_scores
+
+    cumulative = np.concatenate(([0.0], np.cumsum(values)))
+    cumulative_sq = np.concatenate(([0.0], np.cumsum(values * values)))
+    # Stats of values[i - window:i] for every i >= window
+    sums = cumulative[window:n] - cumulative[:n - window]
+    sums_sq = cumulative_sq[window:n] - cumulative_sq[:n - window]
+    means = sums / window
+    stds = np.sqrt(np.maximum(sums_sq / window - means * means, 0.0))
+
+    current = values[window:]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = np.where(stds > 0, (current - means) / stds, 0.0)
+    z_scores[window:] = z
+    mask[window:] = np.abs(z) > z_threshold
+    return mask, z_scores
+
+
+def summarize_series(timestamps, values, window=DEFAULT_WINDOW, span=DEFAULT_SPAN, z_threshold=DEFAULT_Z_THRESHOLD):
+    """
+    Reduce one metric series to a compact trend summary
+
+    Args:
+        timestamps: datetime64 array, ascending
+        values: float64 array aligned with timestamps
+        window: Points per rolling window
+        span: EWMA span in points
+        z_threshold: Z-score above which a point is an anomaly
+
+    Returns:
+        dict: Summary statistics, or {'count': 0} for an empty series
+    """
+    n = len(values)
+    if n == 0:
+        return {'count': 0}
+
+    days = (timestamps - timestamps[0]).astype('timedelta64[us]').astype(np.float64) / 1e6 / SECONDS_PER_DAY
+    rolling = rolling_mean(values, window)
+    mask, z_scores = anomaly_mask(values, window, z_threshold)
+    anomaly_indices = np.flatnonzero(mask)[-MAX_RECENT_ANOMALIES:]
+
+    return {
+        'count': n,
+        'first_timestamp': str(timestamps[0]),
+        'last_timestamp': str(timestamps[-1]),
+        'latest': float(values[-1]),
+        'mean': float(values.mean()),
+        'min': float(values.min()),
+        'max': float(values.max()),
+        'rolling_mean': float(rolling[-1]) if len(rolling) else None,
+        'ewma': ewma_last(values, span),
+        'slope_per_day': linear_slope(days, values) if n > 1 else 0.0,
+        'anomalies': {
+            'count': int(mask.sum()),
+            'recent': [{
+                'timestamp': str(timestamps[i]),
+                'value': float(values[i]),
+                'z_score': round(float(z_scores[i]), 2)
+            } for i in anomaly_indices]
+        }
+    }
+
+
+def user_trend_summary(user_id, user_email=None, window=DEFAULT_WINDOW, span=DEFAULT_SPAN, z_threshold=DEFAULT_Z_THRESHOLD,
+                       since=None, until=None):
+    """
+    Trend summaries for every metric of a user's mood groove and facial analysis history
+
+    Returns:
+        dict: {'mood_groove': {metric: summary}, 'facial_analysis': {metric: summary}}
+    """
+    result = {}
+    timestamps, series = load_mood_groove_series(user_id, user_email, since, until)
+    result['mood_groove'] = {
+        metric: summarize_series(timestamps, series[metric], window, span, z_threshold) for metric in METRICS
+    }
+    if user_email:
+        timestamps, series = load_facial_analysis_series(user_email, since, until)
+        result['facial_analysis'] = {
+            metric: summarize_series(timestamps, series[metric], window, span, z_threshold) for metric in METRICS
+        }
+    return result
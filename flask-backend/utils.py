@@ -1,7 +1,9 @@
 """
 Utility functions for Flask backend
 """
-from datetime import datetime
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import base64
 import logging
 
 def safe_isoformat(datetime_obj):
@@ -86,4 +88,127 @@ def log_error(endpoint, error, user_id=None, additional_context=None):
     if additional_context:
         context.update(additional_context)
     
-    logging.error(f"API Error: {context}")
\ No newline at end of file
+    logging.error(f"API Error: {context}")
+
+def encode_cursor(timestamp, record_id):
+    """
+    Encode a (timestamp, id) keyset position as an opaque cursor string
+    
+    Args:
+        timestamp: datetime of the last record returned
+        record_id: Primary key of the last record returned
+        
+    Returns:
+        str: URL-safe cursor
+    """
+    raw = f"{timestamp.isoformat()}|{record_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor
+    
+    Args:
+        cursor: Cursor string from a previous response
+        
+    Returns:
+        tuple: (datetime, int)
+        
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        timestamp, record_id = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return datetime.fromisoformat(timestamp), int(record_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def resolve_timezone(name):
+    """
+    Look up an IANA timezone name, defaulting to UTC
+    
+    Raises:
+        ValueError: If the name is unknown
+    """
+    try:
+        return ZoneInfo(name or 'UTC')
+    except (ZoneInfoNotFoundError, ValueError) as e:
+        raise ValueError(f"Unknown timezone: {name}") from e
+
+def _to_utc(value):
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def _parse_bound(value, tz):
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError as e:
+        raise ValueError(f"Invalid date or datetime: {value}. Use ISO 8601, e.g. 2025-01-31 or 2025-01-31T08:00:00") from e
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=tz)
+    try:
+        return _to_utc(parsed)
+    except OverflowError as e:
+        # e.g. 0001-01-01T00:00:00+05:00 is before datetime.min in UTC
+        raise ValueError(f"Date out of range: {value}") from e
+
+def parse_time_range(args):
+    """
+    Parse since/until/tz query parameters into a half-open UTC range
+    
+    since is inclusive and until is exclusive. Values without an offset are
+    read in tz (an IANA name, default UTC); a bare date means midnight.
+    
+    Args:
+        args: Query-string mapping, e.g. request.args
+        
+    Returns:
+        tuple: (since, until) as naive UTC datetimes, either may be None
+        
+    Raises:
+        ValueError: If a value or the timezone is invalid, or since >= until
+    """
+    tz = resolve_timezone(args.get('tz'))
+    since = _parse_bound(args['since'], tz) if args.get('since') else None
+    until = _parse_bound(args['until'], tz) if args.get('until') else None
+    if since is not None and until is not None and since >= until:
+        raise ValueError('since must be earlier than until')
+    return since, until
+
+def day_range(date_str, tz):
+    """
+    Half-open UTC range covering one calendar day in tz
+    
+    Args:
+        date_str: Date in YYYY-MM-DD format
+        tz: tzinfo the day is measured in
+        
+    Returns:
+        tuple: (start, end) as naive UTC datetimes
+        
+    Raises:
+        ValueError: If the date is malformed
+    """
+    try:
+        day = datetime.strptime(date_str, '%Y-%m-%d').date()
+    except ValueError as e:
+        raise ValueError('Invalid date format. Use YYYY-MM-DD.') from e
+    return (_to_utc(datetime.combine(day, time(), tzinfo=tz)),
+            _to_utc(datetime.combine(day + timedelta(days=1), time(), tzinfo=tz)))
+
+def time_range_conditions(column, since=None, until=None):
+    """
+    Half-open range predicates on a raw timestamp column
+    
+    Comparing the bare column (rather than e.g. date(column)) lets the
+    database use a (user_id, timestamp) index for the range.
+    
+    Returns:
+        list: Conditions to pass to filter()/where()
+    """
+    conditions = []
+    if since is not None:
+        conditions.append(column >= since)
+    if until is not None:
+        conditions.append(column < until)
+    return conditions